@@ -0,0 +1,493 @@
+"""Synthetic-media benchmark and soak harness for the recording path.
+
+Drives the evaluation shell's "recorded" policy headlessly under the offscreen
+platform with the camera, screen and microphone replaced by synthetic
+generators, and reports latency, frame rate, CPU, memory and output size as JSON.
+
+    python -m bench_recording --cycles 10 --duration 5 --output bench.json
+    python -m bench_recording --soak 7200 --baseline bench.json
+"""
+
+import argparse
+import json
+import math
+import os
+import struct
+import sys
+import time
+from pathlib import Path
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+# Never ship benchmark output to a collection server.
+os.environ.pop("DESQT_UPLOAD_URL", None)
+
+from PyQt6.QtCore import QEvent, QEventLoop, QObject, Qt, QTimer, QUrl
+from PyQt6.QtGui import QColor, QPainter
+from PyQt6.QtMultimedia import (
+    QAudioBuffer,
+    QAudioBufferInput,
+    QAudioFormat,
+    QMediaCaptureSession,
+    QMediaRecorder,
+    QVideoFrame,
+    QVideoFrameFormat,
+    QVideoFrameInput,
+)
+from PyQt6.QtWidgets import QApplication
+
+from capture_backends import CaptureBackend
+from cli_helpers import parse_size, rss_kb
+from video_frames import CanvasPool
+from evaluation_shell import EvaluationShell
+
+# Metrics where a larger value is better; everything else should shrink.
+HIGHER_IS_BETTER = {"achieved_fps"}
+FRAME_POOL_SIZE = 3
+
+
+def spin(seconds):
+    """Run the Qt event loop for a while without busy-waiting."""
+    loop = QEventLoop()
+    QTimer.singleShot(max(0, int(seconds * 1000)), loop.quit)
+    loop.exec()
+
+
+def wait_until(predicate, timeout):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return False
+        spin(min(0.01, remaining))
+    return True
+
+
+class SyntheticVideoSource(QObject):
+    """Generates a moving test pattern into a QVideoFrameInput."""
+
+    def __init__(self, size, fps, color, parent=None):
+        super().__init__(parent)
+        self.size = size
+        self.fps = fps
+        self.color = QColor(color)
+        frame_format = QVideoFrameFormat(
+            size, QVideoFrameFormat.PixelFormat.Format_RGBX8888
+        )
+        frame_format.setStreamFrameRate(fps)
+        self.frame_input = QVideoFrameInput(frame_format, self)
+        self.pool = CanvasPool(size, FRAME_POOL_SIZE)
+        self.timer = QTimer(self)
+        self.timer.setTimerType(Qt.TimerType.PreciseTimer)
+        self.timer.setInterval(int(1000 / fps))
+        self.timer.timeout.connect(self.tick)
+        self.reset()
+
+    def reset(self):
+        self.frame_number = 0
+        self.reset_counts()
+        self.started = None
+
+    def reset_counts(self):
+        self.sent = 0
+        self.dropped = 0
+
+    def start(self):
+        self.reset()
+        self.started = time.monotonic()
+        self.timer.start()
+
+    def stop(self):
+        self.timer.stop()
+
+    def tick(self):
+        # Ticks the timer could not deliver count as dropped frames too.
+        expected = int((time.monotonic() - self.started) * self.fps)
+        if expected > self.frame_number + 1:
+            self.dropped += expected - self.frame_number - 1
+            self.frame_number = expected - 1
+
+        # Only paint images the encoder has released; painting one it still
+        # holds would detach it, and the harness's own allocations would show
+        # up in the RSS and CPU being measured.
+        _, image = self.pool.acquire()
+        if image is None:
+            self.dropped += 1
+            self.frame_number += 1
+            return
+        image.fill(Qt.GlobalColor.black)
+        painter = QPainter(image)
+        bar_width = max(1, self.size.width() // 16)
+        x = (self.frame_number * 8) % self.size.width()
+        painter.fillRect(x, 0, bar_width, self.size.height(), self.color)
+        painter.end()
+
+        frame = QVideoFrame(image)
+        interval = 1_000_000 // self.fps
+        frame.setStartTime(self.frame_number * interval)
+        frame.setEndTime((self.frame_number + 1) * interval)
+        if self.frame_input.sendVideoFrame(frame):
+            self.sent += 1
+        else:
+            self.dropped += 1
+        self.frame_number += 1
+
+
+class SyntheticAudioSource(QObject):
+    """Generates a 1 kHz tone into a QAudioBufferInput in 20 ms buffers."""
+
+    SAMPLE_RATE = 48000
+    BUFFER_MS = 20
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.format = QAudioFormat()
+        self.format.setSampleRate(self.SAMPLE_RATE)
+        self.format.setChannelCount(1)
+        self.format.setSampleFormat(QAudioFormat.SampleFormat.Int16)
+        self.buffer_input = QAudioBufferInput(self.format, self)
+
+        # 20 ms holds a whole number of 1 kHz periods, so one buffer loops cleanly.
+        samples = self.SAMPLE_RATE * self.BUFFER_MS // 1000
+        self.data = struct.pack(
+            f"<{samples}h",
+            *(
+                int(8000 * math.sin(2 * math.pi * 1000 * i / self.SAMPLE_RATE))
+                for i in range(samples)
+            ),
+        )
+        self.timer = QTimer(self)
+        self.timer.setTimerType(Qt.TimerType.PreciseTimer)
+        self.timer.setInterval(self.BUFFER_MS)
+        self.timer.timeout.connect(self.tick)
+        self.buffer_number = 0
+
+    def start(self):
+        self.buffer_number = 0
+        self.timer.start()
+
+    def stop(self):
+        self.timer.stop()
+
+    def tick(self):
+        start_us = self.buffer_number * self.BUFFER_MS * 1000
+        self.buffer_input.sendAudioBuffer(QAudioBuffer(self.data, self.format, start_us))
+        self.buffer_number += 1
+
+
+class SyntheticBackend(CaptureBackend):
+    """Capture backend recording synthetic generators instead of devices."""
+
+    def __init__(self, window, name, video, audio=None):
+        super().__init__(window)
+        self.name = name
+        self.video = video
+        self.audio = audio
+        self.session = None
+        self.recorder = None
+
+    def sources(self):
+        return [s for s in (self.video, self.audio) if s is not None]
+
+    def prepare(self):
+        self.release()
+        self.session = QMediaCaptureSession(self.window)
+        self.session.setVideoFrameInput(self.video.frame_input)
+        if self.audio is not None:
+            self.session.setAudioBufferInput(self.audio.buffer_input)
+        self.recorder = QMediaRecorder(self.window)
+        output_path = self.window.output_dir / f"{self.name}_recording.mp4"
+        self.recorder.setOutputLocation(QUrl.fromLocalFile(str(output_path.resolve())))
+        self.session.setRecorder(self.recorder)
+        self.recorder.errorOccurred.connect(
+            lambda error, message: self.window.errors.append(f"{self.name}: {message}")
+        )
+        self.recorder.recorderStateChanged.connect(self.on_state_changed)
+
+    def record(self):
+        for source in self.sources():
+            source.start()
+        self.recorder.record()
+
+    def on_state_changed(self, state):
+        self.window.state_log.append((time.monotonic(), self.name, state))
+        if state == QMediaRecorder.RecorderState.RecordingState:
+            # Frames sent or refused before the recorder started are not
+            # part of the recording; count from here.
+            self.video.reset_counts()
+
+    def stop(self):
+        if self.recorder:
+            self.recorder.stop()
+        for source in self.sources():
+            source.stop()
+        return None
+
+    def release(self):
+        """Detach the generators from the previous cycle's session and free it.
+
+        Without this the harness itself would show up as RSS growth.
+        """
+        if self.session is None:
+            return
+        self.session.setVideoFrameInput(None)
+        self.session.setAudioBufferInput(None)
+        self.recorder.deleteLater()
+        self.session.deleteLater()
+
+    def streams(self):
+        return [(self.name, self.recorder)] if self.recorder else []
+
+
+class BenchWindow(EvaluationShell):
+    """Evaluation shell whose capture devices are replaced by synthetic generators."""
+
+    def __init__(self, camera_size, screen_size, fps, output_dir):
+        self.camera_size = camera_size
+        self.screen_size = screen_size
+        self.fps = fps
+        self.output_dir = Path(output_dir).resolve()
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        self.errors = []
+        self.state_log = []
+        # The harness measures the two-recorder path.
+        super().__init__("recorded")
+
+    def load_backends(self):
+        self.camera_source = SyntheticVideoSource(
+            self.camera_size, self.fps, "#2080ff", self
+        )
+        self.screen_source = SyntheticVideoSource(
+            self.screen_size, self.fps, "#20ff80", self
+        )
+        self.audio_source = SyntheticAudioSource(self)
+        return [
+            SyntheticBackend(self, "camera", self.camera_source, self.audio_source),
+            SyntheticBackend(self, "screen", self.screen_source),
+        ]
+
+    def show_error_message(self, title, message):
+        # A modal dialog would hang a headless run; record the error instead.
+        self.errors.append(f"{title}: {message}")
+
+    def maybe_build_review_index(self):
+        # Indexing between cycles would skew the numbers; the harness has
+        # nothing to review.
+        self.session_markers = None
+
+    def all_in_state(self, state):
+        recorders = self.session_recorders()
+        return bool(recorders) and all(r.recorderState() == state for _, r in recorders)
+
+
+def run_session(window, duration, disqualify=False, sample_interval=None):
+    """Run one start -> record -> stop (or disqualify) cycle and measure it."""
+    recording = QMediaRecorder.RecorderState.RecordingState
+    stopped = QMediaRecorder.RecorderState.StoppedState
+
+    # The shell disqualifies a session whose window is not active, so the
+    # window must be shown and focused before the exam starts.
+    window.show()
+    window.activateWindow()
+    if not wait_until(window.isActiveWindow, 5):
+        return failed_run(window, disqualify, "window never became active")
+
+    rss_before = rss_kb()
+    cpu_before = time.process_time()
+    started = time.monotonic()
+    window.start_evaluation()
+    if window.current_page != "evaluation":
+        return failed_run(window, disqualify, "session did not start")
+    if not wait_until(lambda: window.all_in_state(recording), 10):
+        return failed_run(window, disqualify, "recorders never started")
+    start_latency = time.monotonic() - started
+
+    samples = []
+    record_started = time.monotonic()
+    while time.monotonic() - record_started < duration:
+        step = duration if sample_interval is None else sample_interval
+        spin(min(step, duration - (time.monotonic() - record_started)))
+        if sample_interval is not None:
+            samples.append(
+                {
+                    "t": round(time.monotonic() - record_started, 1),
+                    "rss_kb": rss_kb(),
+                    "screen_frames": window.screen_source.sent,
+                    "camera_frames": window.camera_source.sent,
+                }
+            )
+    recorded = time.monotonic() - record_started
+
+    stop_called = time.monotonic()
+    if disqualify:
+        # Same path as a candidate switching away from the exam window.
+        window.event(QEvent(QEvent.Type.WindowDeactivate))
+    else:
+        window.stop_evaluation()
+    finalized = wait_until(lambda: window.all_in_state(stopped), 30)
+    stop_latency = time.monotonic() - stop_called
+    cpu = time.process_time() - cpu_before
+    wall = time.monotonic() - started
+
+    locations = [
+        r.actualLocation().toLocalFile() for _, r in window.session_recorders()
+    ]
+    bytes_written = sum(
+        Path(p).stat().st_size for p in locations if p and Path(p).exists()
+    )
+    sources = (window.camera_source, window.screen_source)
+    result = {
+        "disqualified": disqualify,
+        "finalized": finalized,
+        "start_latency_s": round(start_latency, 4),
+        "stop_to_finalized_s": round(stop_latency, 4),
+        "achieved_fps": round(min(s.sent for s in sources) / recorded, 2),
+        "dropped_frames": sum(s.dropped for s in sources),
+        "cpu_percent": round(100 * cpu / wall, 1),
+        "rss_growth_kb": None if rss_before is None else rss_kb() - rss_before,
+        "bytes_per_minute": int(bytes_written / (recorded / 60)),
+    }
+    if samples:
+        result["samples"] = samples
+    window.go_home()
+    return result
+
+
+def failed_run(window, disqualify, reason):
+    """Abandon a cycle that never reached recording; it reports no numbers."""
+    if window.current_page == "evaluation":
+        window.stop_evaluation()
+        wait_until(
+            lambda: window.all_in_state(QMediaRecorder.RecorderState.StoppedState), 30
+        )
+    window.go_home()
+    return {"disqualified": disqualify, "failed": reason}
+
+
+def summarize(runs):
+    """Average the numeric metrics of several runs."""
+    keys = [
+        k
+        for k, v in runs[0].items()
+        if isinstance(v, (int, float)) and not isinstance(v, bool)
+    ]
+    summary = {k: round(sum(r[k] for r in runs) / len(runs), 4) for k in keys}
+    summary["max_start_latency_s"] = max(r["start_latency_s"] for r in runs)
+    summary["max_stop_to_finalized_s"] = max(r["stop_to_finalized_s"] for r in runs)
+    return summary
+
+
+def compare(summary, baseline, tolerance):
+    """Return the metrics that regressed by more than `tolerance` (a fraction)."""
+    regressions = {}
+    for key, base in baseline.items():
+        if key not in summary or not isinstance(base, (int, float)):
+            continue
+        if base == 0:
+            # No relative change from zero; any increase of a cost (e.g. the
+            # first dropped frame after a clean baseline) is a regression.
+            if key not in HIGHER_IS_BETTER and summary[key] > 0:
+                regressions[key] = {
+                    "baseline": base,
+                    "current": summary[key],
+                    "change": "from zero",
+                }
+            continue
+        change = (summary[key] - base) / abs(base)
+        if key in HIGHER_IS_BETTER:
+            change = -change
+        if change > tolerance:
+            regressions[key] = {
+                "baseline": base,
+                "current": summary[key],
+                "change": f"{change:+.1%}",
+            }
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the recording path.")
+    parser.add_argument("--cycles", type=int, default=5)
+    parser.add_argument("--duration", type=float, default=5.0, help="Seconds per cycle")
+    parser.add_argument(
+        "--disqualify-every",
+        type=int,
+        default=0,
+        help="End every Nth cycle by disqualification instead of Stop",
+    )
+    parser.add_argument("--soak", type=float, help="Run one session this long (s)")
+    parser.add_argument("--sample-interval", type=float, default=60.0)
+    parser.add_argument("--camera-size", type=parse_size, default="1280x720")
+    parser.add_argument("--screen-size", type=parse_size, default="1920x1080")
+    parser.add_argument("--fps", type=int, default=15)
+    parser.add_argument("--output-dir", default="bench_output")
+    parser.add_argument("--output", help="Write the JSON report here")
+    parser.add_argument("--baseline", help="JSON report to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.10)
+    args = parser.parse_args()
+
+    # Run inside the output directory, so the journal, recording stats and
+    # recordings of synthetic sessions stay out of the station's real data.
+    output_dir = Path(args.output_dir).resolve()
+    output_dir.mkdir(parents=True, exist_ok=True)
+    report_path = Path(args.output).resolve() if args.output else None
+    baseline_path = Path(args.baseline).resolve() if args.baseline else None
+    os.chdir(output_dir)
+
+    app = QApplication(sys.argv)
+    window = BenchWindow(args.camera_size, args.screen_size, args.fps, output_dir)
+
+    config = {
+        "camera_size": [args.camera_size.width(), args.camera_size.height()],
+        "screen_size": [args.screen_size.width(), args.screen_size.height()],
+        "fps": args.fps,
+    }
+    if args.soak:
+        config["soak_s"] = args.soak
+        runs = [
+            run_session(window, args.soak, sample_interval=args.sample_interval)
+        ]
+    else:
+        config.update(cycles=args.cycles, duration_s=args.duration)
+        runs = [
+            run_session(
+                window,
+                args.duration,
+                disqualify=bool(
+                    args.disqualify_every and (i + 1) % args.disqualify_every == 0
+                ),
+            )
+            for i in range(args.cycles)
+        ]
+
+    completed = [r for r in runs if "failed" not in r]
+    report = {
+        "config": config,
+        "summary": summarize(completed) if completed else {},
+        "runs": runs,
+        "errors": window.errors,
+    }
+    exit_code = 0
+    if len(completed) < len(runs):
+        # A cycle that never recorded measures nothing; don't pass it off.
+        failed = len(runs) - len(completed)
+        print(f"{failed} of {len(runs)} cycles failed", file=sys.stderr)
+        exit_code = 2
+    elif baseline_path:
+        with open(baseline_path, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        report["regressions"] = compare(
+            report["summary"], baseline["summary"], args.tolerance
+        )
+        exit_code = 1 if report["regressions"] else 0
+
+    text = json.dumps(report, indent=2)
+    if report_path:
+        with open(report_path, "w", encoding="utf-8") as f:
+            f.write(text)
+    print(text)
+    window.close()
+    sys.exit(exit_code)
+
+
+if __name__ == "__main__":
+    main()
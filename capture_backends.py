@@ -0,0 +1,169 @@
+"""Capture backends for the evaluation shell.
+
+A session policy names the backends it needs. Backends are imported and
+constructed only when a policy asks for them, so an exam without recording
+never loads QtMultimedia or touches a media device.
+"""
+
+import importlib
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from PyQt6.QtCore import QTimer, Qt
+from PyQt6.QtGui import QGuiApplication
+
+# Backend name -> "module:Class", imported on first use.
+BACKENDS = {
+    "camera": "media_backends:CameraBackend",
+    "screen": "media_backends:ScreenBackend",
+    "composite": "media_backends:CompositeBackend",
+    "screenshot": "capture_backends:ScreenshotBackend",
+}
+
+# Named session policies: which backends an exam needs.
+POLICIES = {
+    "none": (),
+    "recorded": ("camera", "screen"),
+    "composite": ("composite",),
+    "screenshots": ("screenshot",),
+}
+
+STATS_FILE = "recording_stats.jsonl"
+
+
+def load_backend(name, window):
+    module_name, class_name = BACKENDS[name].split(":")
+    module = importlib.import_module(module_name)
+    return getattr(module, class_name)(window)
+
+
+class RecordingStats:
+    """Measures process CPU use over a recording session.
+
+    Every finished session is appended to recording_stats.jsonl so policies
+    (e.g. composited against separate camera and screen recorders) can be
+    compared run against run.
+    """
+
+    def __init__(self, mode):
+        self.mode = mode
+        self.cpu_start = time.process_time()
+        self.wall_start = time.monotonic()
+
+    def finish(self, **extra):
+        wall = time.monotonic() - self.wall_start
+        cpu = time.process_time() - self.cpu_start
+        report = {
+            "mode": self.mode,
+            "wall_seconds": round(wall, 3),
+            "cpu_seconds": round(cpu, 3),
+            "cpu_percent": round(100 * cpu / wall, 1) if wall else 0.0,
+            **extra,
+        }
+        try:
+            with open(STATS_FILE, "a", encoding="utf-8") as f:
+                f.write(json.dumps(report) + "\n")
+        except OSError as e:
+            print(f"Could not write recording stats: {e}")
+        return report
+
+
+class CaptureBackend:
+    """Base class for capture backends.
+
+    `window` is the EvaluationShell; backends report recorder transitions to
+    `window.on_recorder_state_changed(recorder, state)` and errors to
+    `window.report_recorder_error(source, error, message, hint)`.
+    """
+
+    name = ""
+
+    def __init__(self, window):
+        self.window = window
+
+    def check(self):
+        """Return (label, ok) pairs shown on the home page."""
+        return []
+
+    def prepare(self):
+        """Set up capture for a new session; raise on failure."""
+
+    def record(self):
+        pass
+
+    def stop(self):
+        """Stop capturing and return a dict of stats, or None."""
+        return None
+
+    def streams(self):
+        """Return (stream name, QMediaRecorder) pairs recorded this session."""
+        return []
+
+    def frame_counts(self):
+        """Return {stream name: (frames, dropped frames)} so far this session.
+
+        Only the shell's metrics sampler calls this, and only while the
+        metrics endpoint is enabled, so backends may attach their frame
+        counters here on first use.
+        """
+        return {}
+
+
+class ScreenshotBackend(CaptureBackend):
+    """Samples the primary screen every few seconds instead of recording video.
+
+    Grabs happen on the GUI thread (Qt requires it); JPEG encoding and disk
+    writes happen on a single worker thread.
+    """
+
+    name = "screenshot"
+    INTERVAL_MS = 5000
+    MAX_WIDTH = 1280
+
+    def __init__(self, window):
+        super().__init__(window)
+        self.timer = QTimer()
+        self.timer.timeout.connect(self.capture)
+        self.writer = ThreadPoolExecutor(max_workers=1)
+        self.output_dir = None
+        self.count = 0
+
+    def check(self):
+        screen = QGuiApplication.primaryScreen()
+        ok = screen is not None and not screen.grabWindow(0).isNull()
+        return [("Screen", ok)]
+
+    def prepare(self):
+        if QGuiApplication.primaryScreen() is None:
+            raise ValueError("No primary screen found")
+        self.output_dir = Path("screenshots") / time.strftime("session-%Y%m%d-%H%M%S")
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        self.count = 0
+
+    def record(self):
+        self.capture()
+        self.timer.start(self.INTERVAL_MS)
+
+    def stop(self):
+        if not self.timer.isActive():
+            return None
+        self.timer.stop()
+        return {"screenshots": self.count}
+
+    def frame_counts(self):
+        return {"screenshot": (self.count, 0)}
+
+    def capture(self):
+        screen = QGuiApplication.primaryScreen()
+        if screen is None:
+            return
+        image = screen.grabWindow(0).toImage()
+        if image.width() > self.MAX_WIDTH:
+            image = image.scaledToWidth(
+                self.MAX_WIDTH, Qt.TransformationMode.SmoothTransformation
+            )
+        path = self.output_dir / f"{self.count:05d}.jpg"
+        self.count += 1
+        self.writer.submit(image.save, str(path), "JPG", 80)
@@ -0,0 +1,33 @@
+"""Small helpers shared by the command-line tools."""
+
+import sys
+
+from PyQt6.QtCore import QSize
+
+
+def rss_kb():
+    """Current resident set size in KiB.
+
+    Falls back to the peak RSS where /proc is missing, and returns None where
+    neither is available (Windows).
+    """
+    try:
+        with open("/proc/self/status", "r") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS reports bytes, Linux KiB.
+    return peak // 1024 if sys.platform == "darwin" else peak
+
+
+def parse_size(text):
+    """Parse a WIDTHxHEIGHT command-line argument into a QSize."""
+    width, height = text.lower().split("x")
+    return QSize(int(width), int(height))
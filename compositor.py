@@ -0,0 +1,271 @@
+"""Single-encoder picture-in-picture recording of screen and camera.
+
+Screen and camera frames are pulled from video sinks, a worker thread paints
+a scaled camera inset onto the screen frame from the mapped frame data, and
+the result is fed to one QMediaRecorder through QVideoFrameInput, with the
+microphone muxed into the same file. Compared with running a camera recorder
+and a screen recorder side by side this halves the number of encoders and
+yields one synchronized file.
+"""
+
+import threading
+import time
+from pathlib import Path
+
+from PyQt6.QtCore import QObject, QRect, QUrl, Qt, pyqtSignal
+from PyQt6.QtGui import QGuiApplication, QImage, QPainter
+from PyQt6.QtMultimedia import (
+    QAudioInput,
+    QCamera,
+    QMediaCaptureSession,
+    QMediaRecorder,
+    QScreenCapture,
+    QVideoFrame,
+    QVideoFrameFormat,
+    QVideoFrameInput,
+    QVideoSink,
+)
+
+from screen_capture import plan_screen
+from video_frames import CanvasPool, LatestFrame, draw_latest
+
+# Camera inset width as a fraction of the output width, and its margin.
+INSET_FRACTION = 0.25
+INSET_MARGIN = 16
+# Output canvases are recycled; the encoder may still hold the previous ones.
+CANVAS_POOL_SIZE = 3
+
+
+class PictureInPictureRecorder(QObject):
+    """Composites the camera onto the screen and records both with one encoder."""
+
+    # Emitted from the worker thread; delivered on the GUI thread.
+    frameComposed = pyqtSignal(QVideoFrame)
+
+    def __init__(
+        self,
+        camera_device,
+        audio_device,
+        output_path="session_recording.mp4",
+        error_handler=None,
+        state_handler=None,
+        parent=None,
+    ):
+        super().__init__(parent)
+        self.camera_device = camera_device
+        self.audio_device = audio_device
+        self.output_path = str(Path(output_path).resolve())
+        self.error_handler = error_handler
+        self.state_handler = state_handler
+
+        self.camera = None
+        self.screen_capture = None
+        self.recorder = None
+
+        # Latest frames from the sinks, handed to the worker.
+        self.screen_latest = LatestFrame()
+        self.camera_latest = LatestFrame()
+
+        self.worker = None
+        self.running = threading.Event()
+        self.counters = {}
+
+        self.frameComposed.connect(self._send_frame)
+
+    def prepare(self):
+        screen = QGuiApplication.primaryScreen()
+        if not screen:
+            raise ValueError("No primary screen found")
+        plan = plan_screen(screen)
+        self.size = plan.target_size
+        self.fps = plan.fps
+
+        # Screen and camera only feed sinks; neither has its own recorder.
+        self.screen_capture = QScreenCapture(self)
+        self.screen_capture.setScreen(screen)
+        self.screen_sink = QVideoSink(self)
+        self.screen_session = QMediaCaptureSession(self)
+        self.screen_session.setScreenCapture(self.screen_capture)
+        self.screen_session.setVideoSink(self.screen_sink)
+        self.screen_sink.videoFrameChanged.connect(self.screen_latest.on_frame)
+
+        self.camera = QCamera(self.camera_device, self)
+        camera_format = self._rgb_camera_format()
+        if camera_format is not None:
+            self.camera.setCameraFormat(camera_format)
+        self.camera_sink = QVideoSink(self)
+        self.camera_session = QMediaCaptureSession(self)
+        self.camera_session.setCamera(self.camera)
+        self.camera_session.setVideoSink(self.camera_sink)
+        self.camera_sink.videoFrameChanged.connect(self.camera_latest.on_frame)
+
+        # The one encoder: composited video plus microphone audio.
+        frame_format = QVideoFrameFormat(
+            self.size, QVideoFrameFormat.PixelFormat.Format_RGBX8888
+        )
+        frame_format.setStreamFrameRate(self.fps)
+        self.frame_input = QVideoFrameInput(frame_format, self)
+        self.audio_input = QAudioInput(self.audio_device, self)
+        self.session = QMediaCaptureSession(self)
+        self.session.setVideoFrameInput(self.frame_input)
+        self.session.setAudioInput(self.audio_input)
+        self.recorder = QMediaRecorder(self)
+        self.recorder.setVideoResolution(self.size)
+        self.recorder.setVideoFrameRate(self.fps)
+        self.recorder.setOutputLocation(QUrl.fromLocalFile(self.output_path))
+        if self.error_handler:
+            self.recorder.errorOccurred.connect(self.error_handler)
+        if self.state_handler:
+            self.recorder.recorderStateChanged.connect(
+                lambda state: self.state_handler(self.recorder, state)
+            )
+        self.session.setRecorder(self.recorder)
+
+        # Preallocate the output canvases once per session.
+        self.canvas_pool = CanvasPool(self.size, CANVAS_POOL_SIZE)
+        self.screen_latest.clear()
+        self.camera_latest.clear()
+        self.inset_rect = None
+
+        self.screen_capture.setActive(True)
+        self.camera.start()
+
+    def _rgb_camera_format(self):
+        """Smallest RGB camera format wide enough for the inset, if any.
+
+        RGB frames can be mapped straight into the composition; YUV frames
+        would need a conversion on the GUI thread first.
+        """
+        inset_width = int(self.size.width() * INSET_FRACTION)
+        formats = [
+            f
+            for f in self.camera_device.videoFormats()
+            if QVideoFrameFormat.imageFormatFromPixelFormat(f.pixelFormat())
+            != QImage.Format.Format_Invalid
+        ]
+        if not formats:
+            return None
+        wide_enough = [f for f in formats if f.resolution().width() >= inset_width]
+        return min(
+            wide_enough or formats,
+            key=lambda f: f.resolution().width() * f.resolution().height(),
+        )
+
+    def record(self):
+        self.screen_latest.received = 0
+        self.camera_latest.received = 0
+        self.counters = {
+            "composed": 0,
+            "encoded": 0,
+            "dropped_by_encoder": 0,
+            "canvas_busy": 0,
+            "late_ticks": 0,
+        }
+        self.session_start = time.monotonic()
+        self.recorder.record()
+        self.running.set()
+        self.worker = threading.Thread(
+            target=self._compose_loop, name="pip-compositor", daemon=True
+        )
+        self.worker.start()
+
+    def stop(self):
+        # prepare() already started the camera and screen, so release them
+        # even when record() never ran (e.g. the session ended first).
+        was_running = self.running.is_set()
+        self.running.clear()
+        if self.worker is not None:
+            self.worker.join(timeout=2)
+            self.worker = None
+        if self.recorder is not None:
+            self.recorder.stop()
+        if self.screen_capture is not None:
+            self.screen_capture.setActive(False)
+        if self.camera is not None:
+            self.camera.stop()
+        if not was_running:
+            return None
+
+        counters = dict(self.counters)
+        counters["screen_frames"] = self.screen_latest.received
+        counters["camera_frames"] = self.camera_latest.received
+        # Screen frames that arrived but were superseded before being composed.
+        counters["skipped_screen_frames"] = max(
+            0, counters["screen_frames"] - counters["composed"]
+        )
+        elapsed = max(1e-6, time.monotonic() - self.session_start)
+        report = {
+            "target_fps": self.fps,
+            "achieved_fps": round(counters["encoded"] / elapsed, 2),
+            **counters,
+        }
+        print("Composited recording stats:", report)
+        return report
+
+    # Worker thread
+
+    def _compose_loop(self):
+        interval = 1.0 / self.fps
+        next_tick = time.monotonic()
+        while self.running.is_set():
+            index, canvas = self.canvas_pool.acquire()
+            if canvas is None:
+                # Every canvas is still queued in the encoder; skip this tick.
+                self.counters["canvas_busy"] += 1
+            elif self._compose(canvas):
+                frame = QVideoFrame(canvas)
+                start_us = int((time.monotonic() - self.session_start) * 1_000_000)
+                frame.setStartTime(start_us)
+                frame.setEndTime(start_us + int(interval * 1_000_000))
+                self.counters["composed"] += 1
+                self.frameComposed.emit(frame)
+                # Drop our reference so the canvas can be released.
+                del frame
+
+            next_tick += interval
+            delay = next_tick - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            else:
+                # Composition overran its slot; skip ahead instead of bursting.
+                self.counters["late_ticks"] += 1
+                next_tick = time.monotonic()
+
+    def _compose(self, canvas):
+        """Paint screen and camera inset into `canvas`; False if no screen yet."""
+        painter = QPainter(canvas)
+        painter.setRenderHint(QPainter.RenderHint.SmoothPixmapTransform, False)
+        if not draw_latest(painter, canvas.rect(), self.screen_latest):
+            painter.end()
+            return False
+
+        if self.inset_rect is None and self.camera_latest.size is not None:
+            self.inset_rect = self._inset_rect(self.camera_latest.size)
+        if self.inset_rect is not None and draw_latest(
+            painter, self.inset_rect, self.camera_latest
+        ):
+            painter.setPen(Qt.GlobalColor.white)
+            painter.drawRect(self.inset_rect)
+        painter.end()
+        return True
+
+    def _inset_rect(self, camera_size):
+        width = int(self.size.width() * INSET_FRACTION)
+        height = int(width * camera_size.height() / max(1, camera_size.width()))
+        return QRect(
+            self.size.width() - width - INSET_MARGIN,
+            self.size.height() - height - INSET_MARGIN,
+            width,
+            height,
+        )
+
+    # GUI thread
+
+    def _send_frame(self, frame):
+        if not self.running.is_set():
+            return
+        if self.frame_input.sendVideoFrame(frame):
+            self.counters["encoded"] += 1
+        else:
+            # The encoder is still busy with earlier frames.
+            self.counters["dropped_by_encoder"] += 1
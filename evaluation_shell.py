@@ -0,0 +1,640 @@
+"""Evaluation shell shared by fullscreen_v1 and fullscreen_V2.
+
+The shell owns the page stack, the session timer, key blocking and focus
+disqualification. What gets captured during a session is decided by its
+policy (see capture_backends.POLICIES): backends are imported only when the
+policy names them, and pages are built the first time they are shown, so an
+unrecorded exam never loads QtMultimedia.
+
+    python -m evaluation_shell --policy none
+    python -m evaluation_shell --measure
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+from PyQt6.QtCore import QEvent, Qt, QTimer
+from PyQt6.QtGui import QGuiApplication
+from PyQt6.QtWidgets import (
+    QApplication,
+    QLabel,
+    QMainWindow,
+    QMessageBox,
+    QPushButton,
+    QStackedWidget,
+    QVBoxLayout,
+    QWidget,
+)
+
+from capture_backends import POLICIES, RecordingStats, load_backend
+from cli_helpers import rss_kb
+from journal import EventJournal, EventType
+import metrics
+import stall_watchdog
+
+# Per-session recording directories: recordings/session-<id>/
+RECORDINGS_DIR = "recordings"
+
+SESSIONS = metrics.counter("desqt_sessions_total", "Evaluations started", ["policy"])
+SESSION_ACTIVE = metrics.gauge("desqt_session_active", "1 while an evaluation runs")
+DISQUALIFICATIONS = metrics.counter(
+    "desqt_disqualifications_total", "Evaluations ended for misuse", ["reason"]
+)
+RECORDER_START_SECONDS = metrics.histogram(
+    "desqt_recorder_start_seconds",
+    "Time from requesting a recording to the recorder reporting RecordingState",
+    ["stream"],
+)
+RECORDER_ERRORS = metrics.counter(
+    "desqt_recorder_errors_total", "Recorder errors reported", ["source"]
+)
+RECORDING_BYTES = metrics.counter(
+    "desqt_recording_bytes_total", "Bytes written to recording files", ["stream"]
+)
+RECORDED_FRAMES = metrics.counter(
+    "desqt_recorded_frames_total", "Frames delivered for recording", ["stream"]
+)
+RECORDING_FPS = metrics.gauge(
+    "desqt_recording_fps", "Frame rate over the last sampling interval", ["stream"]
+)
+DROPPED_FRAMES = metrics.counter(
+    "desqt_dropped_frames_total", "Frames lost before or at the encoder", ["stream"]
+)
+# Recording metrics are sampled this often while a session runs.
+METRICS_SAMPLE_MS = 5000
+
+
+# Helper function to set a larger font on widgets
+def set_large_font(widget, point_size=18):
+    font = widget.font()
+    font.setPointSize(point_size)
+    widget.setFont(font)
+
+
+def resolve_policy(policy):
+    """Accept a policy name or an explicit sequence of backend names."""
+    if isinstance(policy, str):
+        return POLICIES[policy]
+    return tuple(policy)
+
+
+class EvaluationShell(QMainWindow):
+    def __init__(self, policy="none"):
+        super().__init__()
+        self.setWindowTitle("Full Screen Evaluation App")
+        self.stack = QStackedWidget()
+        self.setCentralWidget(self.stack)
+
+        self.policy_name = policy if isinstance(policy, str) else "+".join(policy)
+        self.policy = resolve_policy(policy)
+
+        # Opt-in GUI stall watchdog (DESQT_WATCHDOG=1).
+        stall_watchdog.install_from_env()
+        # Opt-in Prometheus endpoint (DESQT_METRICS_PORT).
+        self.export_metrics = metrics.start_from_env() is not None
+
+        # Structured journal of proctoring events (focus, keys, devices, ...).
+        self.journal = EventJournal()
+
+        # Journal screen hot-plug.
+        app = QGuiApplication.instance()
+        app.screenAdded.connect(self.on_screen_added)
+        app.screenRemoved.connect(
+            lambda screen: self.journal.log(
+                EventType.SCREEN_REMOVED, screen=screen.name()
+            )
+        )
+        for screen in QGuiApplication.screens():
+            self.watch_screen_geometry(screen)
+
+        # Capture backends named by the policy; nothing is imported otherwise.
+        self.backends = self.load_backends()
+        self.recording_stats = None
+
+        # Every session records into its own directory, so a later session
+        # never overwrites files still being uploaded or reviewed.
+        self.recordings_dir = Path(RECORDINGS_DIR)
+        self.session_dir = None
+
+        # Session markers and stream start times for the review index.
+        self.session_markers = None
+        self.stream_starts = {}
+        # Review indexes still to build, oldest first; paused during exams.
+        self.review_builders = []
+
+        # Optional upload of finished recordings to a collection server.
+        self.uploader = None
+        upload_url = os.environ.get("DESQT_UPLOAD_URL")
+        if upload_url and self.policy:
+            from uploader import RecordingUploader
+
+            bandwidth = os.environ.get("DESQT_UPLOAD_BANDWIDTH")
+            self.uploader = RecordingUploader(
+                upload_url,
+                bandwidth_limit=int(bandwidth) if bandwidth else None,
+            )
+            self.uploader.start()
+
+        # Pages are built the first time they are shown.
+        self.page_builders = {
+            "home": self.create_home_page,
+            "evaluation": self.create_evaluation_page,
+            "summary": self.create_summary_page,
+            "disqualified": self.create_disqualified_page,
+        }
+        self.pages = {}
+        self.current_page = None
+        self.show_page("home")
+
+        # Timer variables.
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self.update_timer)
+        self.start_time = 0
+        self.record_requested = time.monotonic()
+
+        # Live recording metrics: last frame counts and file sizes seen.
+        self.metrics_timer = QTimer(self)
+        self.metrics_timer.setInterval(METRICS_SAMPLE_MS)
+        self.metrics_timer.timeout.connect(self.sample_recording_metrics)
+        self.frame_samples = {}
+        self.file_sizes = {}
+        self.last_sample = 0
+
+    def load_backends(self):
+        return [load_backend(name, self) for name in self.policy]
+
+    # Pages
+
+    def show_page(self, name):
+        page = self.pages.get(name)
+        if page is None:
+            page = self.page_builders[name]()
+            self.pages[name] = page
+            self.stack.addWidget(page)
+        self.stack.setCurrentWidget(page)
+        self.current_page = name
+
+    def create_home_page(self):
+        page = QWidget()
+        layout = QVBoxLayout(page)
+
+        # Status labels for the devices the policy's backends need.
+        all_ok = True
+        for backend in self.backends:
+            for label, ok in backend.check():
+                status_label = QLabel(
+                    f"{label}: OK" if ok else f"{label}: Not available"
+                )
+                set_large_font(status_label)
+                layout.addWidget(status_label)
+                all_ok = all_ok and ok
+
+        # Start button.
+        self.btn_start = QPushButton("Start")
+        set_large_font(self.btn_start)
+        self.btn_start.clicked.connect(self.start_evaluation)
+        # Disable start if any device is missing.
+        self.btn_start.setEnabled(all_ok)
+        layout.addWidget(self.btn_start)
+        return page
+
+    def create_evaluation_page(self):
+        page = QWidget()
+        layout = QVBoxLayout(page)
+        self.timer_label = QLabel("Timer: 0 s")
+        set_large_font(self.timer_label)
+        self.timer_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        btn_stop = QPushButton("Stop")
+        set_large_font(btn_stop)
+        btn_stop.clicked.connect(self.stop_evaluation)
+        layout.addWidget(self.timer_label)
+        layout.addWidget(btn_stop)
+        return page
+
+    def create_summary_page(self):
+        page = QWidget()
+        layout = QVBoxLayout(page)
+        self.summary_label = QLabel("Summary")
+        set_large_font(self.summary_label)
+        self.summary_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        btn_back = QPushButton("Back to Home")
+        set_large_font(btn_back)
+        btn_back.clicked.connect(self.go_home)
+        layout.addWidget(self.summary_label)
+        layout.addWidget(btn_back)
+        return page
+
+    def create_disqualified_page(self):
+        page = QWidget()
+        layout = QVBoxLayout(page)
+        label = QLabel("Disqualified due to misuse")
+        set_large_font(label)
+        label.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        btn_back = QPushButton("Back to Home")
+        set_large_font(btn_back)
+        btn_back.clicked.connect(self.go_home)
+        layout.addWidget(label)
+        layout.addWidget(btn_back)
+        return page
+
+    # Session lifecycle
+
+    def init_recordings(self):
+        try:
+            for backend in self.backends:
+                backend.prepare()
+        except Exception as e:
+            print(f"Error initializing recordings: {e}")
+            self.show_error_message("Recording Initialization Error", str(e))
+            return False
+        return True
+
+    def start_evaluation(self):
+        try:
+            # Indexing an earlier session would compete with this one.
+            self.pause_review_index()
+            session = self.journal.begin_session(
+                policy=self.policy_name,
+                screens=len(QGuiApplication.screens()),
+            )
+            self.session_dir = self.recordings_dir / f"session-{session}"
+            if self.backends:
+                self.session_dir.mkdir(parents=True, exist_ok=True)
+
+            # Ensure recordings are initialized successfully
+            if not self.init_recordings():
+                self.journal.end_session(EventType.SESSION_STOP, error="init_failed")
+                self.run_review_index()
+                return
+
+            self.session_markers = {
+                "session": session,
+                "start": time.time(),
+                "stop": None,
+                "disqualified": None,
+                "reason": None,
+            }
+            self.stream_starts = {}
+
+            SESSIONS.labels(self.policy_name).inc()
+            SESSION_ACTIVE.set(1)
+            self.show_page("evaluation")
+            self.start_time = time.time()
+            self.timer.start(1000)  # update every second
+            self.showFullScreen()
+            # Entering full screen while the window is inactive disqualifies
+            # the session at once; don't start recorders after that.
+            if self.current_page != "evaluation":
+                return
+
+            if self.backends:
+                self.recording_stats = RecordingStats(self.policy_name)
+            sample_metrics = self.export_metrics and bool(self.backends)
+            if sample_metrics:
+                # Frames that arrived before record() are not part of the files.
+                self.frame_samples = self.frame_counts()
+                self.last_sample = time.monotonic()
+            self.record_requested = time.monotonic()
+            for backend in self.backends:
+                backend.record()
+            if sample_metrics:
+                self.metrics_timer.start()
+
+        except Exception as e:
+            print(f"Error starting evaluation: {e}")
+            self.show_error_message("Evaluation Start Error", str(e))
+
+    def update_timer(self):
+        elapsed = int(time.time() - self.start_time)
+        self.timer_label.setText(f"Timer: {elapsed} s")
+
+    def stop_recordings(self):
+        """Stop every backend and log the session's stats."""
+        reports = {}
+        for backend in self.backends:
+            report = backend.stop()
+            if report:
+                reports.update(report)
+        if self.metrics_timer.isActive():
+            self.metrics_timer.stop()
+            self.sample_recording_metrics()
+            for stream in self.frame_samples:
+                RECORDING_FPS.labels(stream).set(0)
+        SESSION_ACTIVE.set(0)
+        if self.recording_stats:
+            print("Recording stats:", self.recording_stats.finish(**reports))
+            self.recording_stats = None
+        # The exam is over; an index paused for it may continue.
+        self.run_review_index()
+
+    def stop_evaluation(self):
+        # Stop timer and recordings, show summary.
+        self.timer.stop()
+        self.stop_recordings()
+
+        elapsed = int(time.time() - self.start_time)
+        self.journal.end_session(EventType.SESSION_STOP, elapsed=elapsed)
+        if self.session_markers:
+            self.session_markers["stop"] = time.time()
+            self.maybe_build_review_index()
+        self.show_page("summary")
+        self.summary_label.setText(f"Elapsed Time: {elapsed} s")
+        self.showNormal()  # exit full screen
+
+        for name, recorder in self.session_recorders():
+            print(f"{name} recording saved at:", recorder.actualLocation().toLocalFile())
+
+    def go_home(self):
+        # Return to home page; also stop any ongoing recording.
+        self.timer.stop()
+        self.stop_recordings()
+        if self.journal.session:
+            self.journal.end_session(EventType.SESSION_STOP)
+        self.showNormal()
+        self.show_page("home")
+
+    def disqualify(self, reason):
+        """End the session on misuse: stop recording and show the verdict."""
+        self.timer.stop()
+        self.stop_recordings()
+        self.journal.end_session(EventType.DISQUALIFIED, reason=reason)
+        DISQUALIFICATIONS.labels(reason).inc()
+        if self.session_markers:
+            now = time.time()
+            self.session_markers.update(stop=now, disqualified=now, reason=reason)
+            self.maybe_build_review_index()
+        # Leave the evaluation page first: showNormal() sends another window
+        # state change, which would otherwise disqualify the session again.
+        self.show_page("disqualified")
+        self.showNormal()
+
+    # Recorder callbacks from the backends
+
+    def session_recorders(self):
+        """Name and recorder of every stream recorded in this session."""
+        return [stream for backend in self.backends for stream in backend.streams()]
+
+    def on_recorder_state_changed(self, recorder, state):
+        """Journal and measure recorder transitions; queue finished files for upload."""
+        # Only recording backends call this, so QtMultimedia is already loaded.
+        from PyQt6.QtMultimedia import QMediaRecorder
+
+        location = recorder.actualLocation().toLocalFile()
+        self.journal.log(
+            EventType.RECORDER_STATE,
+            state=state.name,
+            file=Path(location).name if location else None,
+        )
+        stream = next(
+            (name for name, r in self.session_recorders() if r is recorder), "unknown"
+        )
+        if state == QMediaRecorder.RecorderState.RecordingState:
+            self.stream_starts[recorder] = time.time()
+            RECORDER_START_SECONDS.labels(stream).observe(
+                time.monotonic() - self.record_requested
+            )
+        if state != QMediaRecorder.RecorderState.StoppedState:
+            return
+        if location:
+            # Count what finalizing added (e.g. the moov box), then forget it.
+            self.sample_file_size(stream, location)
+            self.file_sizes.pop(location, None)
+        self.maybe_build_review_index()
+        if self.uploader is None:
+            return
+        if location and Path(location).exists():
+            self.uploader.enqueue(location)
+
+    # Live recording metrics
+
+    def frame_counts(self):
+        counts = {}
+        for backend in self.backends:
+            counts.update(backend.frame_counts())
+        return counts
+
+    def sample_recording_metrics(self):
+        """Export frames, drops, fps and bytes written since the last sample.
+
+        QMediaRecorder reports none of these while recording, so frames come
+        from the backends' own counters and bytes from the growing files.
+        """
+        now = time.monotonic()
+        elapsed = max(1e-6, now - self.last_sample)
+        self.last_sample = now
+        for stream, (frames, dropped) in self.frame_counts().items():
+            last_frames, last_dropped = self.frame_samples.get(stream, (0, 0))
+            self.frame_samples[stream] = (frames, dropped)
+            RECORDED_FRAMES.labels(stream).inc(max(0, frames - last_frames))
+            DROPPED_FRAMES.labels(stream).inc(max(0, dropped - last_dropped))
+            RECORDING_FPS.labels(stream).set(round((frames - last_frames) / elapsed, 2))
+        for stream, recorder in self.session_recorders():
+            location = recorder.actualLocation().toLocalFile()
+            if location:
+                self.sample_file_size(stream, location)
+
+    def sample_file_size(self, stream, location):
+        try:
+            size = os.path.getsize(location)
+        except OSError:
+            return
+        written = size - self.file_sizes.get(location, 0)
+        RECORDING_BYTES.labels(stream).inc(max(0, written))
+        self.file_sizes[location] = size
+
+    def maybe_build_review_index(self):
+        """Index the session for review once every recorder has finalized."""
+        markers = self.session_markers
+        if markers is None or markers["stop"] is None:
+            return
+        recorders = self.session_recorders()
+        if not recorders:
+            self.session_markers = None
+            return
+
+        from PyQt6.QtMultimedia import QMediaRecorder
+        from review_index import ReviewIndexBuilder
+
+        stopped = QMediaRecorder.RecorderState.StoppedState
+        if any(r.recorderState() != stopped for _, r in recorders):
+            return
+        self.session_markers = None
+
+        streams = {}
+        for name, recorder in recorders:
+            location = recorder.actualLocation().toLocalFile()
+            if not location:
+                continue
+            started = self.stream_starts.get(recorder, markers["start"])
+            streams[name] = (location, int((started - markers["start"]) * 1000))
+        if not streams:
+            # Nothing was recorded, e.g. disqualified before record().
+            return
+        builder = ReviewIndexBuilder(markers["session"], streams, markers, parent=self)
+        builder.finished.connect(self.on_review_index_finished)
+        self.review_builders.append(builder)
+        self.run_review_index()
+
+    def pause_review_index(self):
+        if self.review_builders:
+            self.review_builders[0].pause()
+
+    def run_review_index(self):
+        """Let the oldest queued index build, unless an exam is running."""
+        if self.review_builders and not self.timer.isActive():
+            self.review_builders[0].start()
+
+    def on_review_index_finished(self, index_path):
+        self.review_builders.pop(0).deleteLater()
+        self.run_review_index()
+
+    def report_recorder_error(self, source, error, error_string, hint=None):
+        """Handle recorder errors with detailed logging."""
+        print(f"{source.title()} Recorder Error: {error}")
+        print(f"Error Details: {error_string}")
+        self.journal.log(
+            EventType.RECORDER_ERROR,
+            source=source,
+            error=error.name,
+            message=error_string,
+        )
+        RECORDER_ERRORS.labels(source).inc()
+        if source != "camera":
+            # Additional diagnostic information
+            for screen in QGuiApplication.screens():
+                print("Screen:", screen.name())
+                print("Screen Geometry:", screen.geometry())
+                print("Screen Device Pixel Ratio:", screen.devicePixelRatio())
+
+        message = error_string
+        if hint:
+            message = f"Error: {error_string}\n\n{hint}"
+        self.show_error_message(f"{source.title()} Recording Error", message)
+
+    def show_error_message(self, title, message):
+        """Display an error message to the user."""
+        error_dialog = QMessageBox()
+        error_dialog.setIcon(QMessageBox.Icon.Critical)
+        error_dialog.setWindowTitle(title)
+        error_dialog.setText(message)
+        error_dialog.exec()
+
+    # Screen events
+
+    def on_screen_added(self, screen):
+        self.journal.log(EventType.SCREEN_ADDED, screen=screen.name())
+        self.watch_screen_geometry(screen)
+
+    def watch_screen_geometry(self, screen):
+        screen.geometryChanged.connect(
+            lambda geometry, screen=screen: self.journal.log(
+                EventType.SCREEN_GEOMETRY,
+                screen=screen.name(),
+                geometry=[
+                    geometry.x(),
+                    geometry.y(),
+                    geometry.width(),
+                    geometry.height(),
+                ],
+                ratio=screen.devicePixelRatio(),
+            )
+        )
+
+    # Override keyPressEvent to block F11 and Esc.
+    def keyPressEvent(self, event):
+        if event.key() in (Qt.Key.Key_F11, Qt.Key.Key_Escape):
+            self.journal.log(EventType.KEY_BLOCKED, key=event.key())
+            event.ignore()
+        else:
+            super().keyPressEvent(event)
+
+    # Monitor focus events: if focus is lost during evaluation, disqualify.
+    def changeEvent(self, event):
+        if event.type() == QEvent.Type.WindowStateChange:
+            self.journal.log(
+                EventType.WINDOW_STATE,
+                state=self.windowState().value,
+                active=self.isActiveWindow(),
+            )
+            if not self.isActiveWindow() and self.current_page == "evaluation":
+                self.disqualify("window_state")
+        super().changeEvent(event)
+
+    def event(self, event):
+        if event.type() == QEvent.Type.WindowDeactivate:
+            self.journal.log(EventType.FOCUS_LOST)
+            if self.current_page == "evaluation":
+                self.disqualify("focus_lost")
+        return super().event(event)
+
+    def closeEvent(self, event):
+        self.journal.close()
+        super().closeEvent(event)
+
+
+def measure_startup(policy, started):
+    """Report time from launch until the window is shown, RSS and loaded modules.
+
+    `started` is the wall-clock launch time handed down by --measure.
+    """
+    app = QApplication.instance()
+    window = EvaluationShell(policy)
+    window.resize(800, 600)
+    window.show()
+    QTimer.singleShot(0, app.quit)
+    app.exec()
+    report = {
+        "policy": policy,
+        "startup_ms": round((time.time() - started) * 1000, 1),
+        "rss_kb": rss_kb(),
+        "qtmultimedia_loaded": "PyQt6.QtMultimedia" in sys.modules,
+    }
+    window.close()
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the evaluation shell.")
+    parser.add_argument("--policy", default="none", choices=sorted(POLICIES))
+    parser.add_argument(
+        "--measure",
+        action="store_true",
+        help="Measure startup time and RSS of every policy, each in a fresh process",
+    )
+    parser.add_argument("--measure-from", type=float, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.measure:
+        for policy in sorted(POLICIES):
+            command = [sys.executable, "-m", "evaluation_shell", "--policy", policy]
+            result = subprocess.run(
+                command + ["--measure-from", str(time.time())],
+                capture_output=True,
+                text=True,
+            )
+            lines = [line for line in result.stdout.splitlines() if line.startswith("{")]
+            if lines:
+                print(lines[-1])
+            else:
+                error = result.stderr.strip().splitlines()[-1:] or ["no output"]
+                print(json.dumps({"policy": policy, "error": error[0]}))
+        return
+
+    app = QApplication(sys.argv)
+    if args.measure_from:
+        print(json.dumps(measure_startup(args.policy, args.measure_from)))
+        return
+
+    window = EvaluationShell(args.policy)
+    window.resize(800, 600)
+    window.show()
+    sys.exit(app.exec())
+
+
+if __name__ == "__main__":
+    main()
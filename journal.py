@@ -0,0 +1,267 @@
+"""Compact append-only journal of proctoring events.
+
+Events are encoded as length-prefixed binary records, queued in memory and
+written in batches by a background thread, with an fsync at every session
+boundary. One file is kept per day:
+
+    journal/2026-10-19.djl
+        b"DQJ1" file magic, then records of
+        <u32 length> <i64 wall_us> <u64 monotonic_ns> <u32 session> <u8 type> <data>
+
+where data is compact UTF-8 JSON (or empty). The reader only unpacks the
+fixed header while filtering and decodes data for matching records.
+"""
+
+import json
+import os
+import struct
+import threading
+import time
+from collections import deque
+from datetime import date, datetime
+from enum import IntEnum
+from pathlib import Path
+
+MAGIC = b"DQJ1"
+LENGTH = struct.Struct("<I")
+HEADER = struct.Struct("<qQIB")
+
+DEFAULT_DIR = "journal"
+# Flush when this many records are queued, or every FLUSH_INTERVAL seconds.
+FLUSH_THRESHOLD = 256
+FLUSH_INTERVAL = 1.0
+# Beyond this the oldest queued records are dropped rather than growing forever.
+RING_CAPACITY = 65536
+
+
+class EventType(IntEnum):
+    SESSION_START = 1
+    SESSION_STOP = 2
+    DISQUALIFIED = 3
+    FOCUS_LOST = 4
+    WINDOW_STATE = 5
+    KEY_BLOCKED = 6
+    SCREEN_ADDED = 7
+    SCREEN_REMOVED = 8
+    SCREEN_GEOMETRY = 9
+    DEVICES_CHANGED = 10
+    RECORDER_STATE = 11
+    RECORDER_ERROR = 12
+
+
+# Events that close or open a session; these are fsynced immediately.
+BOUNDARY_EVENTS = {
+    EventType.SESSION_START,
+    EventType.SESSION_STOP,
+    EventType.DISQUALIFIED,
+}
+
+
+def journal_path(directory, day):
+    return Path(directory) / f"{day.isoformat()}.djl"
+
+
+class EventJournal:
+    """Queues events in memory and appends them to the day's journal file."""
+
+    def __init__(self, directory=DEFAULT_DIR):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.session = 0
+        self.last_session = 0
+        self.dropped = 0
+
+        self.ring = deque(maxlen=RING_CAPACITY)
+        self.wake = threading.Event()
+        self.sync_requested = threading.Event()
+        self.closing = threading.Event()
+
+        self.file = None
+        self.file_day = None
+        self.thread = threading.Thread(
+            target=self._run, name="event-journal", daemon=True
+        )
+        self.thread.start()
+
+    # Producer side (GUI thread): encode and enqueue, never touch the disk.
+
+    def log(self, event_type, **data):
+        payload = json.dumps(data, separators=(",", ":")).encode() if data else b""
+        body = HEADER.pack(
+            time.time_ns() // 1000,
+            time.monotonic_ns(),
+            self.session,
+            event_type,
+        )
+        if len(self.ring) == RING_CAPACITY:
+            self.dropped += 1
+        self.ring.append(LENGTH.pack(len(body) + len(payload)) + body + payload)
+        if event_type in BOUNDARY_EVENTS:
+            self.sync_requested.set()
+            self.wake.set()
+        elif len(self.ring) >= FLUSH_THRESHOLD:
+            self.wake.set()
+
+    def begin_session(self, **data):
+        # Wall-clock seconds make session ids unique across app restarts.
+        self.session = max(int(time.time()) & 0xFFFFFFFF, self.last_session + 1)
+        self.log(EventType.SESSION_START, **data)
+        return self.session
+
+    def end_session(self, event_type=EventType.SESSION_STOP, **data):
+        self.log(event_type, **data)
+        self.last_session = self.session
+        self.session = 0
+
+    def close(self):
+        self.closing.set()
+        self.sync_requested.set()
+        self.wake.set()
+        self.thread.join(timeout=5)
+
+    # Writer thread
+
+    def _open_for_today(self):
+        today = date.today()
+        if self.file_day == today:
+            return
+        if self.file is not None:
+            self.file.close()
+        path = journal_path(self.directory, today)
+        is_new = not path.exists() or path.stat().st_size == 0
+        if not is_new:
+            # Cut off a record torn by a crash so new records stay readable.
+            valid = _valid_length(path)
+            if valid < path.stat().st_size:
+                os.truncate(path, valid)
+        self.file = open(path, "ab")
+        if is_new:
+            self.file.write(MAGIC)
+        self.file_day = today
+
+    def _drain(self):
+        batch = []
+        while True:
+            try:
+                batch.append(self.ring.popleft())
+            except IndexError:
+                break
+        if batch:
+            self._open_for_today()
+            self.file.write(b"".join(batch))
+            self.file.flush()
+
+    def _run(self):
+        while True:
+            self.wake.wait(FLUSH_INTERVAL)
+            self.wake.clear()
+            # Read the flag before draining so the last batch is never missed.
+            closing = self.closing.is_set()
+            try:
+                self._drain()
+                if self.sync_requested.is_set() and self.file is not None:
+                    self.sync_requested.clear()
+                    os.fsync(self.file.fileno())
+            except OSError as e:
+                print(f"Event journal write error: {e}")
+            if closing:
+                if self.file is not None:
+                    self.file.close()
+                return
+
+
+def _valid_length(path):
+    """Return the byte length of the complete records at the start of a file."""
+    with open(path, "rb") as f:
+        buffer = f.read()
+    offset = len(MAGIC)
+    while offset + LENGTH.size <= len(buffer):
+        (length,) = LENGTH.unpack_from(buffer, offset)
+        if offset + LENGTH.size + length > len(buffer):
+            break
+        offset += LENGTH.size + length
+    return offset
+
+
+def read_events(path, session=None, types=None, since=None, until=None):
+    """Yield matching events of one journal file as dictionaries.
+
+    `types` is a collection of EventType; `since`/`until` are wall-clock
+    datetimes. A torn record at the end of the file (crash mid-write) is
+    ignored.
+    """
+    with open(path, "rb") as f:
+        buffer = f.read()
+    if buffer[: len(MAGIC)] != MAGIC:
+        raise ValueError(f"{path} is not an event journal")
+    type_set = {int(t) for t in types} if types is not None else None
+    since_us = int(since.timestamp() * 1_000_000) if since else None
+    until_us = int(until.timestamp() * 1_000_000) if until else None
+
+    offset = len(MAGIC)
+    end = len(buffer)
+    while offset + LENGTH.size <= end:
+        (length,) = LENGTH.unpack_from(buffer, offset)
+        start = offset + LENGTH.size
+        offset = start + length
+        if offset > end or length < HEADER.size:
+            break
+        wall_us, monotonic_ns, record_session, event_type = HEADER.unpack_from(
+            buffer, start
+        )
+        if session is not None and record_session != session:
+            continue
+        if type_set is not None and event_type not in type_set:
+            continue
+        if since_us is not None and wall_us < since_us:
+            continue
+        if until_us is not None and wall_us >= until_us:
+            continue
+        data_start = start + HEADER.size
+        yield {
+            "time": wall_us / 1_000_000,
+            "monotonic_ns": monotonic_ns,
+            "session": record_session,
+            "type": EventType(event_type).name,
+            "data": json.loads(buffer[data_start:offset]) if offset > data_start else {},
+        }
+
+
+def read_day(day=None, directory=DEFAULT_DIR, **filters):
+    path = journal_path(directory, day or date.today())
+    if not path.exists():
+        return []
+    return list(read_events(path, **filters))
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Read a day's event journal.")
+    parser.add_argument("--day", type=date.fromisoformat, default=date.today())
+    parser.add_argument("--dir", default=DEFAULT_DIR)
+    parser.add_argument("--session", type=int)
+    parser.add_argument(
+        "--type",
+        action="append",
+        choices=[t.name for t in EventType],
+        help="Repeat to select several event types",
+    )
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    events = read_day(
+        args.day,
+        args.dir,
+        session=args.session,
+        types=[EventType[t] for t in args.type] if args.type else None,
+    )
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    for event in events:
+        stamp = datetime.fromtimestamp(event["time"]).isoformat(timespec="milliseconds")
+        print(stamp, event["session"], event["type"], json.dumps(event["data"]))
+    print(f"{len(events)} events in {elapsed_ms:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
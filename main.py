@@ -1,5 +1,6 @@
 import sys
 import os
+import time
 import urllib.request
 import tempfile
 from pathlib import Path
@@ -17,6 +18,26 @@ from PyQt6.QtWebEngineWidgets import QWebEngineView
 from PyQt6.QtWebEngineCore import QWebEnginePage
 from PyQt6.QtGui import QIcon, QAction
 
+import metrics
+import stall_watchdog
+
+PAGE_LOAD_SECONDS = metrics.histogram(
+    "desqt_page_load_seconds",
+    "Time from load start to load finished",
+    ["mode", "result"],
+)
+CONNECTIVITY_PROBE_SECONDS = metrics.histogram(
+    "desqt_connectivity_probe_seconds",
+    "Duration of the blocking connectivity probe",
+    ["result"],
+)
+CONNECTIVITY_CHANGES = metrics.counter(
+    "desqt_connectivity_changes_total",
+    "Switches between online and offline mode",
+    ["to"],
+)
+ONLINE = metrics.gauge("desqt_online", "1 while online content is shown")
+
 
 def get_resource_path(relative_path):
     """Get absolute path to resource, works for dev and for PyInstaller"""
@@ -107,6 +128,11 @@ class WebBrowser(QMainWindow):
     def __init__(self, online_url, offline_path):
         super().__init__()
 
+        # Opt-in GUI stall watchdog (DESQT_WATCHDOG=1).
+        stall_watchdog.install_from_env()
+        # Opt-in Prometheus endpoint (DESQT_METRICS_PORT).
+        metrics.start_from_env()
+
         # Store URLs
         self.online_url = online_url
         self.offline_path = offline_path
@@ -158,6 +184,8 @@ class WebBrowser(QMainWindow):
         layout.addWidget(self.browser)
 
         # Connect error handler
+        self.load_started = None
+        self.browser.page().loadStarted.connect(self.handle_load_started)
         self.browser.page().loadFinished.connect(self.handle_load_finished)
 
         # Initialize - Check connection and load appropriate URL
@@ -172,33 +200,53 @@ class WebBrowser(QMainWindow):
 
     def is_online(self):
         """Check if we can connect to the internet"""
+        started = time.monotonic()
         try:
             # Try to connect to a reliable server (Google's DNS)
             urllib.request.urlopen("https://8.8.8.8", timeout=1)
-            return True
+            online = True
         except:
-            return False
+            online = False
+        CONNECTIVITY_PROBE_SECONDS.labels("online" if online else "offline").observe(
+            time.monotonic() - started
+        )
+        return online
+
+    def set_online_mode(self, online):
+        if online != self.online_mode:
+            CONNECTIVITY_CHANGES.labels("online" if online else "offline").inc()
+        self.online_mode = online
+        ONLINE.set(int(online))
 
     def load_appropriate_content(self):
         """Load either online or offline content based on connectivity"""
         if self.is_online():
             self.browser.load(QUrl(self.online_url))
             self.status_bar.showMessage("Online mode")
-            self.online_mode = True
+            self.set_online_mode(True)
         else:
             offline_url = QUrl.fromLocalFile(self.offline_path)
             self.browser.load(offline_url)
             self.status_bar.showMessage("Offline mode - Using local content")
-            self.online_mode = False
+            self.set_online_mode(False)
+
+    def handle_load_started(self):
+        self.load_started = time.monotonic()
 
     def handle_load_finished(self, success):
         """Handle page load completion"""
+        if self.load_started is not None:
+            PAGE_LOAD_SECONDS.labels(
+                "online" if self.online_mode else "offline",
+                "ok" if success else "failed",
+            ).observe(time.monotonic() - self.load_started)
+            self.load_started = None
         if not success and self.online_mode:
             # If online load failed, switch to offline mode
             self.status_bar.showMessage("Connection failed - Using local content")
             offline_url = QUrl.fromLocalFile(self.offline_path)
             self.browser.load(offline_url)
-            self.online_mode = False
+            self.set_online_mode(False)
 
     def check_connection(self):
         """Manually check connection and switch modes if needed"""
@@ -229,6 +277,12 @@ class WebBrowser(QMainWindow):
 
 
 def main():
+    # Headless batch rendering: python -m main --render urls.txt [--png] [--pdf]
+    if sys.argv[1:2] == ["--render"]:
+        from render_batch import main as render_main
+
+        sys.exit(render_main(sys.argv[2:]))
+
     # Create application
     app = QApplication(sys.argv)
 
@@ -0,0 +1,287 @@
+"""QtMultimedia capture backends: camera, screen and composited recording.
+
+Only imported when a session policy needs recording.
+"""
+
+import os
+
+from PyQt6.QtCore import QUrl
+from PyQt6.QtGui import QGuiApplication
+from PyQt6.QtMultimedia import (
+    QAudioInput,
+    QCamera,
+    QMediaCaptureSession,
+    QMediaDevices,
+    QMediaRecorder,
+    QVideoSink,
+)
+
+from capture_backends import CaptureBackend
+from compositor import PictureInPictureRecorder
+from journal import EventType
+from screen_capture import (
+    MultiScreenRecorder,
+    delete_when_finalized,
+    encode_cost_report,
+)
+
+SCREEN_ERROR_HINT = (
+    "Possible causes:\n"
+    "- Insufficient permissions\n"
+    "- Screen capture not supported\n"
+    "- Missing video codec"
+)
+
+
+def watch_media_devices(window):
+    """Journal camera and microphone hot-plug, once per window."""
+    if getattr(window, "media_devices", None) is not None:
+        return
+    window.media_devices = QMediaDevices(window)
+    window.media_devices.videoInputsChanged.connect(
+        lambda: window.journal.log(
+            EventType.DEVICES_CHANGED,
+            kind="video",
+            count=len(QMediaDevices.videoInputs()),
+        )
+    )
+    window.media_devices.audioInputsChanged.connect(
+        lambda: window.journal.log(
+            EventType.DEVICES_CHANGED,
+            kind="audio",
+            count=len(QMediaDevices.audioInputs()),
+        )
+    )
+
+
+def screen_grab_ok():
+    """Check for screen capture permission."""
+    screen = QGuiApplication.primaryScreen()
+    return screen is not None and not screen.grabWindow(0).isNull()
+
+
+class FrameTap:
+    """Counts the frames a capture session delivers, for the live metrics.
+
+    Taps are attached lazily from frame_counts(), which only the metrics
+    sampler calls, so without DESQT_METRICS_PORT no session gets a sink.
+    With a nominal `fps`, a gap in the frames' timestamps longer than one and
+    a half frame intervals counts the frames missing from it as dropped.
+    """
+
+    def __init__(self, session, fps=0):
+        self.fps = fps
+        self.frames = 0
+        self.dropped = 0
+        self.last_us = None
+        self.sink = QVideoSink(session)
+        session.setVideoSink(self.sink)
+        self.sink.videoFrameChanged.connect(self.on_frame)
+
+    def on_frame(self, frame):
+        self.frames += 1
+        start_us = frame.startTime()
+        if not self.fps or start_us < 0:
+            return
+        if self.last_us is not None:
+            interval_us = 1_000_000 / self.fps
+            gap_us = start_us - self.last_us
+            if gap_us > 1.5 * interval_us:
+                self.dropped += round(gap_us / interval_us) - 1
+        self.last_us = start_us
+
+
+class CameraBackend(CaptureBackend):
+    """Records the default camera and microphone to camera_recording.mp4.
+
+    The file goes into the session's own directory, see EvaluationShell.
+    """
+
+    name = "camera"
+
+    def __init__(self, window):
+        super().__init__(window)
+        self.camera_device = QMediaDevices.defaultVideoInput()
+        self.audio_device = QMediaDevices.defaultAudioInput()
+        watch_media_devices(window)
+        self.camera = None
+        self.audio_input = None
+        self.capture_session = None
+        self.recorder = None
+        self.frame_tap = None
+
+    def check(self):
+        return [
+            ("Camera", not self.camera_device.isNull()),
+            ("Microphone", not self.audio_device.isNull()),
+        ]
+
+    def prepare(self):
+        self.release()
+        self.camera = QCamera(self.camera_device, self.window)
+        self.audio_input = QAudioInput(self.audio_device, self.window)
+
+        self.capture_session = QMediaCaptureSession(self.window)
+        self.capture_session.setCamera(self.camera)
+        self.capture_session.setAudioInput(self.audio_input)
+        self.frame_tap = None
+
+        self.recorder = QMediaRecorder(self.window)
+        self.capture_session.setRecorder(self.recorder)
+
+        camera_output_path = str(
+            (self.window.session_dir / "camera_recording.mp4").resolve()
+        )
+        self.recorder.setOutputLocation(QUrl.fromLocalFile(camera_output_path))
+
+        self.recorder.errorOccurred.connect(
+            lambda error, message: self.window.report_recorder_error(
+                "camera", error, message
+            )
+        )
+        self.recorder.recorderStateChanged.connect(
+            lambda state, recorder=self.recorder: (
+                self.window.on_recorder_state_changed(recorder, state)
+            )
+        )
+
+        # Start camera
+        self.camera.start()
+
+    def record(self):
+        self.recorder.record()
+        print("Camera Recorder State:", self.recorder.recorderState())
+
+    def stop(self):
+        if self.recorder:
+            self.recorder.stop()
+        if self.camera:
+            self.camera.stop()
+        return None
+
+    def release(self):
+        """Free the previous session's objects once its file is finalized."""
+        objects = (self.recorder, self.capture_session, self.audio_input, self.camera)
+        previous = [obj for obj in objects if obj is not None]
+        delete_when_finalized(self.recorder, previous)
+
+    def streams(self):
+        return [("camera", self.recorder)] if self.recorder else []
+
+    def frame_counts(self):
+        if self.recorder is None:
+            return {}
+        if self.frame_tap is None:
+            fps = self.camera.cameraFormat().maxFrameRate()
+            self.frame_tap = FrameTap(self.capture_session, fps)
+        return {"camera": (self.frame_tap.frames, self.frame_tap.dropped)}
+
+
+class ScreenBackend(CaptureBackend):
+    """Records every connected screen, or one mosaic of them."""
+
+    name = "screen"
+
+    def __init__(self, window):
+        super().__init__(window)
+        self.recording = None
+        self.frame_taps = {}
+
+    def check(self):
+        return [("Screen", screen_grab_ok())]
+
+    def prepare(self):
+        # One capture per connected screen, or a single mosaic stream.
+        if self.recording is None:
+            self.recording = MultiScreenRecorder(
+                mosaic=os.environ.get("DESQT_SCREEN_MOSAIC") == "1",
+                error_handler=lambda error, message: self.window.report_recorder_error(
+                    "screen", error, message, SCREEN_ERROR_HINT
+                ),
+                state_handler=self.window.on_recorder_state_changed,
+                parent=self.window,
+            )
+        self.recording.prepare(self.window.session_dir)
+        self.frame_taps = {}
+        print("Screen recording initialized successfully")
+        print("Screen encode cost:", encode_cost_report(QGuiApplication.screens()))
+
+    def record(self):
+        self.recording.record()
+        print(
+            "Screen Recorder States:",
+            [r.recorderState() for r in self.recording.recorders()],
+        )
+
+    def stop(self):
+        if self.recording:
+            self.recording.stop()
+        return None
+
+    def streams(self):
+        return self.recording.streams() if self.recording else []
+
+    def frame_counts(self):
+        if self.recording is None:
+            return {}
+        if self.recording.mosaic:
+            counters = self.recording.mosaic_counters
+            frames = counters.get("encoded", 0)
+            return {"screen": (frames, counters.get("dropped_by_encoder", 0))}
+        # Screens may only send changed frames, so no drops are inferred.
+        for _, session, _ in list(self.recording.captures.values()):
+            if session not in self.frame_taps:
+                self.frame_taps[session] = FrameTap(session)
+        return {"screen": (sum(t.frames for t in self.frame_taps.values()), 0)}
+
+
+class CompositeBackend(CaptureBackend):
+    """Camera inset on the primary screen plus microphone, in one encoder."""
+
+    name = "composite"
+
+    def __init__(self, window):
+        super().__init__(window)
+        self.camera_device = QMediaDevices.defaultVideoInput()
+        self.audio_device = QMediaDevices.defaultAudioInput()
+        watch_media_devices(window)
+        self.recording = None
+
+    def check(self):
+        return [
+            ("Camera", not self.camera_device.isNull()),
+            ("Microphone", not self.audio_device.isNull()),
+            ("Screen", screen_grab_ok()),
+        ]
+
+    def prepare(self):
+        if self.recording:
+            delete_when_finalized(self.recording.recorder, [self.recording])
+        self.recording = PictureInPictureRecorder(
+            self.camera_device,
+            self.audio_device,
+            output_path=self.window.session_dir / "session_recording.mp4",
+            error_handler=lambda error, message: self.window.report_recorder_error(
+                "composite", error, message
+            ),
+            state_handler=self.window.on_recorder_state_changed,
+            parent=self.window,
+        )
+        self.recording.prepare()
+
+    def record(self):
+        self.recording.record()
+        print("Composite Recorder State:", self.recording.recorder.recorderState())
+
+    def stop(self):
+        return self.recording.stop() if self.recording else None
+
+    def streams(self):
+        return [("session", self.recording.recorder)] if self.recording else []
+
+    def frame_counts(self):
+        if self.recording is None:
+            return {}
+        counters = self.recording.counters
+        frames = counters.get("encoded", 0)
+        return {"session": (frames, counters.get("dropped_by_encoder", 0))}
@@ -0,0 +1,326 @@
+"""Headless batch rendering of URLs to PNG and/or PDF with QtWebEngine.
+
+A fixed pool of web views is created once and reused for every URL, so
+thousands of pages render in one process without paying browser start-up per
+URL. Each job has its own timeout; image and PDF files are written on a
+background thread so the event loop keeps feeding the pool.
+
+    python -m render_batch urls.txt --png --pdf --workers 4 --output-dir renders
+    python -m main --render urls.txt --png
+"""
+
+import argparse
+import json
+import os
+import re
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from PyQt6.QtCore import QMarginsF, QSize, Qt, QTimer, QUrl
+from PyQt6.QtGui import QPageLayout, QPageSize
+from PyQt6.QtWebEngineWidgets import QWebEngineView
+from PyQt6.QtWidgets import QApplication
+
+from cli_helpers import parse_size
+
+# Give a stopped load this long to report back before the view is reused.
+STOP_GRACE_MS = 1000
+
+
+def read_urls(path):
+    """URLs from a file ('-' for stdin), one per line; '#' starts a comment."""
+    f = sys.stdin if path == "-" else open(path, "r", encoding="utf-8")
+    with f:
+        urls = []
+        for line in f:
+            line = line.split("#", 1)[0].strip()
+            if line:
+                urls.append(line)
+    return urls
+
+
+def output_stem(index, url):
+    """Stable, filesystem-safe file name for the index-th URL."""
+    name = re.sub(r"[^A-Za-z0-9.-]+", "_", QUrl(url).host() + QUrl(url).path())
+    return f"{index:05d}-{name.strip('_')[:80] or 'page'}"
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def write_file(path, data):
+    with open(path, "wb") as f:
+        f.write(data)
+
+
+class RenderJob:
+    def __init__(self, index, url):
+        self.index = index
+        self.url = url
+        self.started = None
+        self.loaded = None
+        self.finished = None
+        self.error = None
+
+
+class RenderSlot:
+    """One reusable web view and the job it is currently rendering."""
+
+    def __init__(self, renderer):
+        self.renderer = renderer
+        self.view = None
+        self.rendered = 0
+        self.job = None
+        self.draining = False
+
+        self.timeout = QTimer()
+        self.timeout.setSingleShot(True)
+        self.timeout.timeout.connect(self.on_timeout)
+        self.settle = QTimer()
+        self.settle.setSingleShot(True)
+        self.settle.timeout.connect(self.capture)
+        self.create_view()
+
+    def create_view(self):
+        if self.view is not None:
+            self.view.deleteLater()
+        self.view = QWebEngineView()
+        # Rendered offscreen: never mapped, but laid out at the viewport size.
+        self.view.setAttribute(Qt.WidgetAttribute.WA_DontShowOnScreen, True)
+        self.view.resize(self.renderer.viewport)
+        self.view.show()
+        self.view.loadFinished.connect(self.on_load_finished)
+        self.rendered = 0
+
+    def start(self, job):
+        # Bound renderer memory growth by replacing long-lived views.
+        if self.renderer.recycle_after and self.rendered >= self.renderer.recycle_after:
+            self.create_view()
+        self.job = job
+        job.started = time.monotonic()
+        self.timeout.start(self.renderer.timeout_ms)
+        self.view.load(QUrl.fromUserInput(job.url))
+
+    def on_load_finished(self, ok):
+        if self.draining:
+            self.draining = False
+            self.renderer.slot_free(self)
+            return
+        job = self.job
+        if job is None or job.loaded is not None:
+            return
+        job.loaded = time.monotonic()
+        if not ok:
+            self.finish("load failed")
+            return
+        # Let late layout and scripts settle before capturing.
+        self.settle.start(self.renderer.settle_ms)
+
+    def capture(self):
+        job = self.job
+        if job is None:
+            return
+        stem = self.renderer.output_dir / output_stem(job.index, job.url)
+        if self.renderer.png:
+            image = self.view.grab().toImage()
+            self.renderer.writer.submit(image.save, f"{stem}.png", "PNG")
+        if self.renderer.pdf:
+            self.view.page().printToPdf(
+                lambda data, job=job, path=f"{stem}.pdf": self.on_pdf(
+                    job, path, data
+                ),
+                self.renderer.page_layout,
+            )
+        else:
+            self.finish()
+
+    def on_pdf(self, job, path, data):
+        if job is not self.job:
+            return
+        if not data:
+            self.finish("pdf failed")
+            return
+        self.renderer.writer.submit(write_file, path, bytes(data))
+        self.finish()
+
+    def on_timeout(self):
+        if self.job is None:
+            return
+        self.settle.stop()
+        self.finish("timeout", free=False)
+        # Stop the load and reuse the view once it reports back.
+        self.draining = True
+        self.view.stop()
+        QTimer.singleShot(STOP_GRACE_MS, self.end_drain)
+
+    def end_drain(self):
+        if self.draining:
+            self.draining = False
+            self.create_view()
+            self.renderer.slot_free(self)
+
+    def finish(self, error=None, free=True):
+        job = self.job
+        self.job = None
+        self.timeout.stop()
+        job.finished = time.monotonic()
+        job.error = error
+        self.rendered += 1
+        self.renderer.job_done(job)
+        if free:
+            self.renderer.slot_free(self)
+
+
+class BatchRenderer:
+    """Renders a list of URLs through a bounded pool of reusable views."""
+
+    def __init__(
+        self,
+        urls,
+        output_dir="renders",
+        workers=4,
+        png=True,
+        pdf=False,
+        timeout=30.0,
+        settle=0.2,
+        viewport=QSize(1280, 800),
+        recycle_after=200,
+    ):
+        self.jobs = [RenderJob(i, url) for i, url in enumerate(urls)]
+        self.output_dir = Path(output_dir)
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        self.workers = max(1, min(workers, len(self.jobs) or 1))
+        self.png = png
+        self.pdf = pdf
+        self.timeout_ms = int(timeout * 1000)
+        self.settle_ms = int(settle * 1000)
+        self.viewport = viewport
+        self.recycle_after = recycle_after
+        self.page_layout = QPageLayout(
+            QPageSize(QPageSize.PageSizeId.A4),
+            QPageLayout.Orientation.Portrait,
+            QMarginsF(10, 10, 10, 10),
+            QPageLayout.Unit.Millimeter,
+        )
+        self.writer = ThreadPoolExecutor(max_workers=2)
+        self.pending = list(reversed(self.jobs))
+        self.done = []
+        self.slots = []
+        self.started = None
+        self.finished = None
+
+    def run(self):
+        """Render every URL and return the stats report."""
+        self.started = time.monotonic()
+        if not self.jobs:
+            return self.report()
+        self.slots = [RenderSlot(self) for _ in range(self.workers)]
+        for slot in self.slots:
+            self.slot_free(slot)
+        QApplication.instance().exec()
+        self.writer.shutdown(wait=True)
+        self.finished = time.monotonic()
+        for slot in self.slots:
+            slot.view.deleteLater()
+        return self.report()
+
+    def slot_free(self, slot):
+        if self.pending:
+            slot.start(self.pending.pop())
+
+    def job_done(self, job):
+        self.done.append(job)
+        status = job.error or "ok"
+        print(f"[{len(self.done)}/{len(self.jobs)}] {status}: {job.url}", file=sys.stderr)
+        if len(self.done) == len(self.jobs):
+            QApplication.instance().quit()
+
+    def report(self):
+        wall = (self.finished or time.monotonic()) - self.started
+        ok = [j for j in self.done if j.error is None]
+        failures = {}
+        for job in self.done:
+            if job.error:
+                failures[job.error] = failures.get(job.error, 0) + 1
+        report = {
+            "urls": len(self.jobs),
+            "rendered": len(ok),
+            "failures": failures,
+            "workers": self.workers,
+            "wall_s": round(wall, 3),
+            "pages_per_s": round(len(ok) / wall, 2) if wall else 0.0,
+        }
+        if ok:
+            # Load: request to loadFinished; total: request to files queued.
+            for key, start, end in (
+                ("load_ms", "started", "loaded"),
+                ("total_ms", "started", "finished"),
+            ):
+                values = [(getattr(j, end) - getattr(j, start)) * 1000 for j in ok]
+                report[key] = {
+                    "p50": round(statistics.median(values), 1),
+                    "p95": round(percentile(values, 0.95), 1),
+                    "max": round(max(values), 1),
+                }
+        report["failed"] = [
+            {"url": j.url, "error": j.error} for j in self.done if j.error
+        ]
+        return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="render_batch", description="Render URLs to PNG and/or PDF."
+    )
+    parser.add_argument("urls", help="File with one URL per line, or - for stdin")
+    parser.add_argument("--png", action="store_true", help="Save a viewport PNG")
+    parser.add_argument("--pdf", action="store_true", help="Save an A4 PDF")
+    parser.add_argument("--workers", type=int, default=4, help="Concurrent pages")
+    parser.add_argument("--timeout", type=float, default=30.0, help="Seconds per URL")
+    parser.add_argument(
+        "--settle", type=float, default=0.2, help="Seconds to wait after load"
+    )
+    parser.add_argument("--viewport", type=parse_size, default="1280x800")
+    parser.add_argument(
+        "--recycle-after",
+        type=int,
+        default=200,
+        help="Replace a view after this many pages (0 = never)",
+    )
+    parser.add_argument("--output-dir", default="renders")
+    parser.add_argument("--output", help="Write the JSON stats report here")
+    args = parser.parse_args(argv)
+    if not (args.png or args.pdf):
+        args.png = True
+
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    app = QApplication.instance() or QApplication(sys.argv[:1])
+    app.setApplicationName("DesQt")
+
+    renderer = BatchRenderer(
+        read_urls(args.urls),
+        output_dir=args.output_dir,
+        workers=args.workers,
+        png=args.png,
+        pdf=args.pdf,
+        timeout=args.timeout,
+        settle=args.settle,
+        viewport=args.viewport,
+        recycle_after=args.recycle_after,
+    )
+    report = renderer.run()
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text)
+    print(text)
+    return 1 if report["failures"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,385 @@
+"""Precomputed review index for a recorded session.
+
+After a session the camera and screen recordings are indexed once:
+
+    review/session-<id>/index.json
+    review/session-<id>/<stream>-<n>.jpg   thumbnail sprite sheets
+
+The index holds, per stream, its offset from the session start, its duration,
+the keyframe times (read straight from the MP4 sample tables, no decoding)
+and the layout of its thumbnail sheets, plus the session's start, stop and
+disqualification markers. The review window only reads this index, so
+thumbnails show instantly even for multi-hour sessions.
+"""
+
+import json
+import struct
+from pathlib import Path
+
+from PyQt6.QtCore import QObject, QRect, QSize, Qt, QTimer, QUrl, pyqtSignal
+from PyQt6.QtGui import QImage, QPainter
+from PyQt6.QtMultimedia import QMediaPlayer, QVideoSink
+
+REVIEW_DIR = "review"
+THUMBNAIL_INTERVAL_MS = 10_000
+TILE_SIZE = QSize(160, 90)
+SHEET_COLUMNS = 10
+TILES_PER_SHEET = 100
+# Give up on a thumbnail if the decoder has not produced a frame by then.
+SEEK_TIMEOUT_MS = 3000
+
+# MP4 boxes that only contain other boxes on the way to the sample tables.
+CONTAINER_BOXES = {b"moov", b"trak", b"mdia", b"minf", b"stbl"}
+
+
+def _iter_boxes(data, start, end):
+    """Yield (type, payload_start, box_end) for the boxes in data[start:end]."""
+    offset = start
+    while offset + 8 <= end:
+        size, box_type = struct.unpack_from(">I4s", data, offset)
+        header = 8
+        if size == 1:
+            (size,) = struct.unpack_from(">Q", data, offset + 8)
+            header = 16
+        elif size == 0:
+            size = end - offset
+        if size < header or offset + size > end:
+            return
+        yield box_type, offset + header, offset + size
+        offset += size
+
+
+def _read_moov(path):
+    """Read only the moov box, seeking past mdat however large it is."""
+    with open(path, "rb") as f:
+        while True:
+            header = f.read(8)
+            if len(header) < 8:
+                return None
+            size, box_type = struct.unpack(">I4s", header)
+            header_size = 8
+            if size == 1:
+                (size,) = struct.unpack(">Q", f.read(8))
+                header_size = 16
+            elif size == 0:
+                if box_type != b"moov":
+                    return None
+                return f.read()
+            if box_type == b"moov":
+                return f.read(size - header_size)
+            f.seek(size - header_size, 1)
+
+
+def _find(data, start, end, path):
+    """Return (payload_start, box_end) of the first box along `path`."""
+    for box_type, payload, box_end in _iter_boxes(data, start, end):
+        if box_type == path[0]:
+            if len(path) == 1:
+                return payload, box_end
+            return _find(data, payload, box_end, path[1:])
+    return None
+
+
+def video_keyframes(path):
+    """Return (keyframe times in ms, duration in ms) of the first video track.
+
+    Reads the stss (sync samples), stts (sample durations) and mdhd
+    (timescale) tables. Returns ([], 0) for files without a usable moov box,
+    e.g. fragmented recordings.
+    """
+    moov = _read_moov(path)
+    if not moov:
+        return [], 0
+    for box_type, payload, box_end in _iter_boxes(moov, 0, len(moov)):
+        if box_type != b"trak":
+            continue
+        hdlr = _find(moov, payload, box_end, [b"mdia", b"hdlr"])
+        if hdlr is None or moov[hdlr[0] + 8 : hdlr[0] + 12] != b"vide":
+            continue
+
+        stbl = [b"mdia", b"minf", b"stbl"]
+        mdhd = _find(moov, payload, box_end, [b"mdia", b"mdhd"])
+        stts = _find(moov, payload, box_end, stbl + [b"stts"])
+        stss = _find(moov, payload, box_end, stbl + [b"stss"])
+        if mdhd is None or stts is None:
+            return [], 0
+
+        version = moov[mdhd[0]]
+        if version == 1:
+            timescale, duration = struct.unpack_from(">IQ", moov, mdhd[0] + 20)
+        else:
+            timescale, duration = struct.unpack_from(">II", moov, mdhd[0] + 12)
+        if not timescale:
+            return [], 0
+
+        # Decode time of every run of samples from stts.
+        runs = []
+        (count,) = struct.unpack_from(">I", moov, stts[0] + 4)
+        for i in range(count):
+            runs.append(struct.unpack_from(">II", moov, stts[0] + 8 + 8 * i))
+        sample_count = sum(n for n, _ in runs)
+
+        if stss is None:
+            # No sync sample table means every sample is a keyframe.
+            sync = range(1, sample_count + 1)
+        else:
+            (count,) = struct.unpack_from(">I", moov, stss[0] + 4)
+            sync = struct.unpack_from(f">{count}I", moov, stss[0] + 8)
+
+        # Walk keyframe numbers (sorted, 1-based) and stts runs together.
+        times = []
+        run_index = 0
+        run_first = 1
+        run_time = 0
+        for sample in sync:
+            while run_index < len(runs) and sample >= run_first + runs[run_index][0]:
+                run_time += runs[run_index][0] * runs[run_index][1]
+                run_first += runs[run_index][0]
+                run_index += 1
+            if run_index == len(runs):
+                break
+            ticks = run_time + (sample - run_first) * runs[run_index][1]
+            times.append(ticks * 1000 // timescale)
+        return times, duration * 1000 // max(1, timescale)
+    return [], 0
+
+
+def thumbnail_positions(duration_ms, keyframes_ms, interval_ms):
+    """Pick one position per interval, snapped back to the nearest keyframe.
+
+    Seeking to a keyframe needs no decoding of preceding frames, which keeps
+    indexing of multi-hour recordings cheap.
+    """
+    positions = []
+    k = 0
+    for target in range(0, max(1, duration_ms), interval_ms):
+        while k + 1 < len(keyframes_ms) and keyframes_ms[k + 1] <= target:
+            k += 1
+        if keyframes_ms and target - interval_ms < keyframes_ms[k] <= target:
+            positions.append(keyframes_ms[k])
+        else:
+            positions.append(target)
+    return positions
+
+
+def tile_rect(index):
+    """Sheet number and rectangle of thumbnail `index` within its sheet."""
+    sheet, slot = divmod(index, TILES_PER_SHEET)
+    row, column = divmod(slot, SHEET_COLUMNS)
+    return sheet, QRect(
+        column * TILE_SIZE.width(),
+        row * TILE_SIZE.height(),
+        TILE_SIZE.width(),
+        TILE_SIZE.height(),
+    )
+
+
+class ReviewIndexBuilder(QObject):
+    """Builds the review index of one session, one stream after another.
+
+    `streams` maps a stream name ("camera", "screen", ...) to a tuple of
+    (file path, offset in ms of its first frame from the session start).
+    `markers` holds the session's wall-clock start/stop and disqualification.
+    """
+
+    finished = pyqtSignal(str)
+
+    def __init__(
+        self,
+        session,
+        streams,
+        markers,
+        interval_ms=THUMBNAIL_INTERVAL_MS,
+        review_dir=REVIEW_DIR,
+        parent=None,
+    ):
+        super().__init__(parent)
+        self.output_dir = Path(review_dir) / f"session-{session}"
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        self.pending = list(streams.items())
+        self.interval_ms = interval_ms
+        self.index = {
+            "session": session,
+            "markers": markers,
+            "tile": [TILE_SIZE.width(), TILE_SIZE.height()],
+            "sheet_columns": SHEET_COLUMNS,
+            "tiles_per_sheet": TILES_PER_SHEET,
+            "interval_ms": interval_ms,
+            "streams": {},
+        }
+
+        self.player = QMediaPlayer(self)
+        self.sink = QVideoSink(self)
+        self.player.setVideoSink(self.sink)
+        self.player.mediaStatusChanged.connect(self._on_media_status)
+        self.player.errorOccurred.connect(self._on_error)
+        self.sink.videoFrameChanged.connect(self._on_frame)
+
+        self.seek_timer = QTimer(self)
+        self.seek_timer.setSingleShot(True)
+        self.seek_timer.setInterval(SEEK_TIMEOUT_MS)
+        self.seek_timer.timeout.connect(self._skip_thumbnail)
+
+        self.stream = None
+        self.positions = []
+        self.thumbnail = 0
+        self.sheet = None
+        self.waiting = False
+        self.current = None
+        # Nothing is decoded until start().
+        self.paused = True
+
+    def start(self):
+        self.resume()
+
+    def pause(self):
+        """Release the decoder, e.g. while an exam runs; resume() continues.
+
+        The stream being indexed is put back and indexed again from the start.
+        """
+        if self.paused:
+            return
+        self.paused = True
+        self.waiting = False
+        self.seek_timer.stop()
+        self.player.stop()
+        self.player.setSource(QUrl())
+        if self.current is not None:
+            self.pending.insert(0, self.current)
+            del self.index["streams"][self.current[0]]
+            self.current = None
+        self.stream = None
+        self.sheet = None
+
+    def resume(self):
+        if not self.paused:
+            return
+        self.paused = False
+        self._next_stream()
+
+    # Stream sequencing
+
+    def _next_stream(self):
+        if self.paused:
+            return
+        if self.stream is not None:
+            self._save_sheet()
+        if not self.pending:
+            self.player.stop()
+            index_path = self.output_dir / "index.json"
+            with open(index_path, "w", encoding="utf-8") as f:
+                json.dump(self.index, f)
+            print("Review index written to", index_path)
+            self.current = None
+            self.finished.emit(str(index_path))
+            return
+
+        self.current = self.pending.pop(0)
+        self.stream, (path, offset_ms) = self.current
+        keyframes, duration = [], 0
+        if Path(path).exists():
+            try:
+                keyframes, duration = video_keyframes(path)
+            except (struct.error, IndexError) as e:
+                # A damaged file must not take the exam app down; the player
+                # still supplies the duration if it can read the file at all.
+                print(f"Review index: cannot parse {path}: {e}")
+        self.index["streams"][self.stream] = {
+            "file": str(Path(path).resolve()),
+            "offset_ms": offset_ms,
+            "duration_ms": duration,
+            "keyframes_ms": keyframes,
+            "thumbnails": [],
+            "sheets": [],
+        }
+        self.thumbnail = 0
+        self.sheet = None
+        if not Path(path).exists():
+            self._next_stream()
+            return
+        self.player.setSource(QUrl.fromLocalFile(str(Path(path).resolve())))
+
+    def _on_media_status(self, status):
+        if self.paused:
+            return
+        if status != QMediaPlayer.MediaStatus.LoadedMedia or self.waiting:
+            return
+        entry = self.index["streams"][self.stream]
+        if not entry["duration_ms"]:
+            entry["duration_ms"] = self.player.duration()
+        self.positions = thumbnail_positions(
+            entry["duration_ms"], entry["keyframes_ms"], self.interval_ms
+        )
+        # Paused playback delivers a frame after every seek.
+        self.player.pause()
+        self._seek_next()
+
+    def _on_error(self, error, message):
+        if self.paused:
+            return
+        print(f"Review index: cannot read {self.stream}: {message}")
+        self.waiting = False
+        self.seek_timer.stop()
+        self._next_stream()
+
+    # Thumbnails
+
+    def _seek_next(self):
+        if not self.positions:
+            self.waiting = False
+            self._next_stream()
+            return
+        self.waiting = True
+        self.target = self.positions.pop(0)
+        self.seek_timer.start()
+        self.player.setPosition(self.target)
+
+    def _on_frame(self, frame):
+        if not self.waiting or not frame.isValid():
+            return
+        # Ignore frames still in flight from before the seek.
+        if frame.startTime() >= 0 and frame.startTime() // 1000 < self.target - 500:
+            return
+        self.seek_timer.stop()
+        self._add_tile(frame.toImage())
+        self._seek_next()
+
+    def _skip_thumbnail(self):
+        if self.paused:
+            return
+        self._add_tile(None)
+        self._seek_next()
+
+    def _add_tile(self, image):
+        sheet_number, rect = tile_rect(self.thumbnail)
+        if self.sheet is None or sheet_number != self.sheet_number:
+            self._save_sheet()
+            rows = -(-TILES_PER_SHEET // SHEET_COLUMNS)
+            self.sheet = QImage(
+                TILE_SIZE.width() * SHEET_COLUMNS,
+                TILE_SIZE.height() * rows,
+                QImage.Format.Format_RGB32,
+            )
+            self.sheet.fill(Qt.GlobalColor.black)
+            self.sheet_number = sheet_number
+        if image is not None and not image.isNull():
+            painter = QPainter(self.sheet)
+            painter.drawImage(
+                rect,
+                image.scaled(
+                    TILE_SIZE,
+                    Qt.AspectRatioMode.IgnoreAspectRatio,
+                    Qt.TransformationMode.SmoothTransformation,
+                ),
+            )
+            painter.end()
+        self.index["streams"][self.stream]["thumbnails"].append(self.target)
+        self.thumbnail += 1
+
+    def _save_sheet(self):
+        if self.sheet is None:
+            return
+        name = f"{self.stream}-{self.sheet_number}.jpg"
+        self.sheet.save(str(self.output_dir / name), "JPG", 80)
+        self.index["streams"][self.stream]["sheets"].append(name)
+        self.sheet = None
@@ -0,0 +1,338 @@
+"""Review window: plays a session's recordings side by side on one timeline.
+
+Reads the index written by review_index.ReviewIndexBuilder. Both streams are
+sought together in session time, and thumbnails come from the precomputed
+sprite sheets, so scrubbing never waits for the decoder.
+
+    python -m review_window review/session-1792370086/index.json
+"""
+
+import bisect
+import json
+import sys
+from pathlib import Path
+
+from PyQt6.QtCore import QPoint, QRect, Qt, QTimer, QUrl, pyqtSignal
+from PyQt6.QtGui import QColor, QPainter, QPixmap
+from PyQt6.QtMultimedia import QAudioOutput, QMediaPlayer
+from PyQt6.QtMultimediaWidgets import QVideoWidget
+from PyQt6.QtWidgets import (
+    QApplication,
+    QHBoxLayout,
+    QLabel,
+    QMainWindow,
+    QPushButton,
+    QVBoxLayout,
+    QWidget,
+)
+
+from review_index import REVIEW_DIR, tile_rect
+
+# Resync a follower stream when it drifts further than this from the leader.
+MAX_DRIFT_MS = 150
+# Coalesce seeks while the timeline is dragged.
+SEEK_DEBOUNCE_MS = 50
+STRIP_TILES = 7
+
+MARKER_COLORS = {
+    "start": QColor("#40c040"),
+    "stop": QColor("#4080ff"),
+    "disqualified": QColor("#ff4040"),
+}
+
+
+def format_ms(ms):
+    seconds = max(0, ms) // 1000
+    return f"{seconds // 3600:d}:{seconds // 60 % 60:02d}:{seconds % 60:02d}"
+
+
+class ThumbnailSheets:
+    """Lazily loads sprite sheets and cuts single thumbnails out of them."""
+
+    def __init__(self, index_dir, stream):
+        self.index_dir = Path(index_dir)
+        self.names = stream["sheets"]
+        self.positions = stream["thumbnails"]
+        self.pixmaps = {}
+
+    def tile_at(self, stream_ms):
+        """Thumbnail for the last indexed position at or before `stream_ms`."""
+        if not self.positions:
+            return None
+        i = max(0, bisect.bisect_right(self.positions, stream_ms) - 1)
+        return self.tile(i)
+
+    def tile(self, i):
+        if not 0 <= i < len(self.positions):
+            return None
+        sheet, rect = tile_rect(i)
+        if sheet >= len(self.names):
+            return None
+        if sheet not in self.pixmaps:
+            self.pixmaps[sheet] = QPixmap(str(self.index_dir / self.names[sheet]))
+        return self.pixmaps[sheet].copy(rect)
+
+
+class Timeline(QWidget):
+    """Session timeline with markers; click or drag to seek, hover to preview."""
+
+    seekRequested = pyqtSignal(int)
+    hovered = pyqtSignal(int, QPoint)
+
+    def __init__(self, duration_ms, markers, parent=None):
+        super().__init__(parent)
+        self.duration_ms = max(1, duration_ms)
+        self.markers = markers
+        self.position_ms = 0
+        self.setMinimumHeight(28)
+        self.setMouseTracking(True)
+
+    def set_position(self, ms):
+        self.position_ms = ms
+        self.update()
+
+    def _ms_at(self, x):
+        return int(min(max(x, 0), self.width()) / max(1, self.width()) * self.duration_ms)
+
+    def _x_at(self, ms):
+        return int(ms / self.duration_ms * self.width())
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        painter.fillRect(self.rect(), QColor("#303030"))
+        painter.fillRect(
+            QRect(0, 0, self._x_at(self.position_ms), self.height()), QColor("#707070")
+        )
+        for name, ms in self.markers:
+            painter.setPen(MARKER_COLORS.get(name, QColor("white")))
+            x = self._x_at(ms)
+            painter.drawLine(x, 0, x, self.height())
+        painter.end()
+
+    def mousePressEvent(self, event):
+        self.seekRequested.emit(self._ms_at(event.position().x()))
+
+    def mouseMoveEvent(self, event):
+        ms = self._ms_at(event.position().x())
+        if event.buttons() & Qt.MouseButton.LeftButton:
+            self.seekRequested.emit(ms)
+        self.hovered.emit(ms, event.globalPosition().toPoint())
+
+
+class ThumbnailStrip(QWidget):
+    """A few thumbnails around the current position; click one to seek there."""
+
+    seekRequested = pyqtSignal(int)
+
+    def __init__(self, sheets, offset_ms, tile_size, parent=None):
+        super().__init__(parent)
+        self.sheets = sheets
+        self.offset_ms = offset_ms
+        self.tile_width, self.tile_height = tile_size
+        self.center = 0
+        self.setMinimumHeight(self.tile_height)
+
+    def set_position(self, session_ms):
+        stream_ms = session_ms - self.offset_ms
+        center = max(0, bisect.bisect_right(self.sheets.positions, stream_ms) - 1)
+        if center != self.center:
+            self.center = center
+            self.update()
+
+    def _first(self):
+        return self.center - STRIP_TILES // 2
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        painter.fillRect(self.rect(), QColor("black"))
+        slot = self.width() // STRIP_TILES
+        for n in range(STRIP_TILES):
+            pixmap = self.sheets.tile(self._first() + n)
+            if pixmap is None:
+                continue
+            target = QRect(n * slot, 0, slot - 2, self.height())
+            painter.drawPixmap(target, pixmap)
+            if n == STRIP_TILES // 2:
+                painter.setPen(QColor("white"))
+                painter.drawRect(target.adjusted(0, 0, -1, -1))
+        painter.end()
+
+    def mousePressEvent(self, event):
+        n = int(event.position().x()) // max(1, self.width() // STRIP_TILES)
+        i = self._first() + n
+        if 0 <= i < len(self.sheets.positions):
+            self.seekRequested.emit(self.sheets.positions[i] + self.offset_ms)
+
+
+class ReviewWindow(QMainWindow):
+    def __init__(self, index_path):
+        super().__init__()
+        index_path = Path(index_path)
+        with open(index_path, "r", encoding="utf-8") as f:
+            self.index = json.load(f)
+        self.setWindowTitle(f"Session Review - {self.index['session']}")
+
+        # Session timeline: from the earliest stream start to the latest end.
+        self.streams = self.index["streams"]
+        if not self.streams:
+            raise ValueError(f"{index_path} lists no recorded streams")
+        self.duration_ms = max(
+            (s["offset_ms"] + s["duration_ms"] for s in self.streams.values()),
+            default=0,
+        )
+        markers = self.index["markers"]
+        timeline_markers = [
+            (name, int((markers[name] - markers["start"]) * 1000))
+            for name in ("start", "stop", "disqualified")
+            if markers.get(name) is not None
+        ]
+
+        central = QWidget()
+        self.setCentralWidget(central)
+        layout = QVBoxLayout(central)
+
+        # One player per stream, side by side.
+        videos = QHBoxLayout()
+        self.players = {}
+        for name, stream in self.streams.items():
+            video = QVideoWidget()
+            player = QMediaPlayer(self)
+            player.setVideoOutput(video)
+            audio = QAudioOutput(self)
+            player.setAudioOutput(audio)
+            player.setSource(QUrl.fromLocalFile(stream["file"]))
+            self.players[name] = (player, stream["offset_ms"])
+            videos.addWidget(video)
+        layout.addLayout(videos, 1)
+
+        # The screen stream leads; the others follow it.
+        self.leader = "screen" if "screen" in self.players else next(iter(self.players))
+        leader_stream = self.streams[self.leader]
+        self.sheets = ThumbnailSheets(index_path.parent, leader_stream)
+
+        self.strip = ThumbnailStrip(
+            self.sheets,
+            leader_stream["offset_ms"],
+            self.index["tile"],
+        )
+        self.strip.seekRequested.connect(self.request_seek)
+        layout.addWidget(self.strip)
+
+        self.timeline = Timeline(self.duration_ms, timeline_markers)
+        self.timeline.seekRequested.connect(self.request_seek)
+        self.timeline.hovered.connect(self.show_preview)
+        layout.addWidget(self.timeline)
+
+        controls = QHBoxLayout()
+        self.play_button = QPushButton("Play")
+        self.play_button.clicked.connect(self.toggle_play)
+        self.time_label = QLabel(format_ms(0))
+        controls.addWidget(self.play_button)
+        controls.addWidget(self.time_label)
+        controls.addStretch(1)
+        layout.addLayout(controls)
+
+        # Floating preview shown while hovering the timeline.
+        self.preview = QLabel(self, Qt.WindowType.ToolTip)
+        self.preview.hide()
+
+        self.pending_seek = None
+        self.seek_timer = QTimer(self)
+        self.seek_timer.setSingleShot(True)
+        self.seek_timer.setInterval(SEEK_DEBOUNCE_MS)
+        self.seek_timer.timeout.connect(self.apply_seek)
+
+        self.sync_timer = QTimer(self)
+        self.sync_timer.setInterval(250)
+        self.sync_timer.timeout.connect(self.sync_followers)
+        self.sync_timer.start()
+
+    def session_position(self):
+        player, offset = self.players[self.leader]
+        return player.position() + offset
+
+    def request_seek(self, session_ms):
+        # Update the UI at once; the decoders only see the last request.
+        self.pending_seek = session_ms
+        self.timeline.set_position(session_ms)
+        self.strip.set_position(session_ms)
+        self.time_label.setText(format_ms(session_ms))
+        self.seek_timer.start()
+
+    def apply_seek(self):
+        if self.pending_seek is None:
+            return
+        for player, offset in self.players.values():
+            player.setPosition(max(0, self.pending_seek - offset))
+        self.pending_seek = None
+
+    def toggle_play(self):
+        leader = self.players[self.leader][0]
+        playing = leader.playbackState() == QMediaPlayer.PlaybackState.PlayingState
+        for player, _ in self.players.values():
+            if playing:
+                player.pause()
+            else:
+                player.play()
+        self.play_button.setText("Play" if playing else "Pause")
+
+    def sync_followers(self):
+        if self.pending_seek is not None:
+            return
+        session_ms = self.session_position()
+        self.timeline.set_position(session_ms)
+        self.strip.set_position(session_ms)
+        self.time_label.setText(format_ms(session_ms))
+        for name, (player, offset) in self.players.items():
+            if name == self.leader:
+                continue
+            expected = session_ms - offset
+            if abs(player.position() - expected) > MAX_DRIFT_MS:
+                player.setPosition(max(0, expected))
+
+    def show_preview(self, session_ms, global_pos):
+        offset = self.players[self.leader][1]
+        pixmap = self.sheets.tile_at(session_ms - offset)
+        if pixmap is None:
+            self.preview.hide()
+            return
+        self.preview.setPixmap(pixmap)
+        self.preview.adjustSize()
+        self.preview.move(global_pos - QPoint(pixmap.width() // 2, pixmap.height() + 8))
+        self.preview.show()
+
+    def leaveEvent(self, event):
+        self.preview.hide()
+        super().leaveEvent(event)
+
+
+def has_streams(index_path):
+    try:
+        with open(index_path, "r", encoding="utf-8") as f:
+            return bool(json.load(f).get("streams"))
+    except (OSError, ValueError):
+        return False
+
+
+def latest_index(review_dir=REVIEW_DIR):
+    """Newest index that has something to play."""
+    indexes = sorted(
+        Path(review_dir).glob("session-*/index.json"), key=lambda p: p.stat().st_mtime
+    )
+    return next((p for p in reversed(indexes) if has_streams(p)), None)
+
+
+if __name__ == "__main__":
+    app = QApplication(sys.argv)
+    index_path = sys.argv[1] if len(sys.argv) > 1 else latest_index()
+    if index_path is None:
+        print("No review index found")
+        sys.exit(1)
+    try:
+        window = ReviewWindow(index_path)
+    except ValueError as e:
+        print(e)
+        sys.exit(1)
+    window.resize(1280, 720)
+    window.show()
+    sys.exit(app.exec())
@@ -0,0 +1,466 @@
+"""Capture of every connected screen, scaled to what a reviewer needs.
+
+Each screen gets its own target resolution and frame rate, derived from its
+geometry and devicePixelRatio. Alternatively all screens can be composed into
+one downscaled mosaic so a single encoder runs no matter how many monitors
+are attached.
+"""
+
+import re
+import threading
+import time
+from pathlib import Path
+
+from PyQt6.QtCore import QObject, QRect, QSize, Qt, QUrl, pyqtSignal
+from PyQt6.QtGui import QGuiApplication, QPainter
+from PyQt6.QtMultimedia import (
+    QMediaCaptureSession,
+    QMediaRecorder,
+    QScreenCapture,
+    QVideoFrame,
+    QVideoFrameFormat,
+    QVideoFrameInput,
+    QVideoSink,
+)
+
+from video_frames import CanvasPool, LatestFrame, draw_latest
+
+# Largest frame height we encode per screen; reviewers do not need more.
+MAX_CAPTURE_HEIGHT = 1080
+# Pixel rate (pixels per second) one screen is allowed to cost the encoder.
+PIXEL_RATE_BUDGET = 1920 * 1080 * 15
+MIN_FPS = 5
+MAX_FPS = 15
+
+MOSAIC_SIZE = QSize(1920, 1080)
+MOSAIC_FPS = 10
+# Mosaic canvases are recycled; the encoder may still hold the previous ones.
+MOSAIC_POOL_SIZE = 3
+
+
+def _even(value):
+    """Encoders want even frame dimensions."""
+    return max(2, int(value) // 2 * 2)
+
+
+class ScreenPlan:
+    """Capture settings for one screen."""
+
+    def __init__(self, name, physical_size, target_size, fps):
+        self.name = name
+        self.physical_size = physical_size
+        self.target_size = target_size
+        self.fps = fps
+
+    @property
+    def encode_cost(self):
+        """Pixels per second this screen costs the encoder."""
+        return self.target_size.width() * self.target_size.height() * self.fps
+
+    def as_dict(self):
+        return {
+            "screen": self.name,
+            "physical": [self.physical_size.width(), self.physical_size.height()],
+            "target": [self.target_size.width(), self.target_size.height()],
+            "fps": self.fps,
+            "encode_cost": self.encode_cost,
+        }
+
+
+def plan_screen(screen, max_height=MAX_CAPTURE_HEIGHT, budget=PIXEL_RATE_BUDGET):
+    """Derive target resolution and frame rate from a screen's geometry and DPR."""
+    geometry = screen.geometry()
+    ratio = screen.devicePixelRatio()
+    physical = QSize(
+        round(geometry.width() * ratio), round(geometry.height() * ratio)
+    )
+
+    # Scale hi-DPI and very tall screens down to the height cap.
+    scale = min(1.0, max_height / max(1, physical.height()))
+    target = QSize(_even(physical.width() * scale), _even(physical.height() * scale))
+
+    # Spend the same pixel budget on every screen: big screens get fewer fps.
+    pixels = target.width() * target.height()
+    fps = int(min(MAX_FPS, max(MIN_FPS, budget / pixels)))
+    return ScreenPlan(screen.name(), physical, target, fps)
+
+
+def mosaic_layout(screens, canvas_size=MOSAIC_SIZE):
+    """Map each screen to a rectangle on the mosaic canvas.
+
+    The virtual desktop is scaled uniformly so relative monitor placement is
+    kept, and centred on the canvas.
+    """
+    if not screens:
+        return {}
+    desktop = QRect()
+    for screen in screens:
+        desktop = desktop.united(screen.geometry())
+    scale = min(
+        canvas_size.width() / desktop.width(),
+        canvas_size.height() / desktop.height(),
+    )
+    offset_x = (canvas_size.width() - desktop.width() * scale) / 2
+    offset_y = (canvas_size.height() - desktop.height() * scale) / 2
+
+    layout = {}
+    for screen in screens:
+        g = screen.geometry()
+        layout[screen] = QRect(
+            round(offset_x + (g.x() - desktop.x()) * scale),
+            round(offset_y + (g.y() - desktop.y()) * scale),
+            round(g.width() * scale),
+            round(g.height() * scale),
+        )
+    return layout
+
+
+def encode_cost_report(screens, mosaic_size=MOSAIC_SIZE, mosaic_fps=MOSAIC_FPS):
+    """Compare encoder cost of primary-only, per-screen and mosaic capture."""
+    plans = [plan_screen(screen) for screen in screens]
+    primary = QGuiApplication.primaryScreen()
+    # What we encoded before: the primary screen at native resolution, at
+    # whatever rate QScreenCapture delivered, which follows the refresh rate.
+    primary_native = 0
+    for screen, plan in zip(screens, plans):
+        if screen is primary:
+            size = plan.physical_size
+            fps = round(screen.refreshRate()) or MAX_FPS
+            primary_native = size.width() * size.height() * fps
+    return {
+        "screens": [plan.as_dict() for plan in plans],
+        "primary_native": primary_native,
+        "per_screen": sum(plan.encode_cost for plan in plans),
+        "per_screen_encoders": len(plans),
+        "mosaic": mosaic_size.width() * mosaic_size.height() * mosaic_fps,
+        "mosaic_encoders": 1,
+    }
+
+
+def _file_name(screen, index):
+    safe = re.sub(r"[^A-Za-z0-9_-]+", "_", screen.name()).strip("_")
+    return f"screen_recording_{index}_{safe or 'screen'}.mp4"
+
+
+def delete_when_finalized(recorder, objects):
+    """deleteLater() `objects` once `recorder` has finished writing its file.
+
+    Deleting a recorder that is still finalizing cuts its file short.
+    """
+    stopped = QMediaRecorder.RecorderState.StoppedState
+    if recorder is None or recorder.recorderState() == stopped:
+        for obj in objects:
+            obj.deleteLater()
+        return
+
+    def on_state_changed(state):
+        if state == stopped:
+            for obj in objects:
+                obj.deleteLater()
+
+    recorder.recorderStateChanged.connect(on_state_changed)
+
+
+class MultiScreenRecorder(QObject):
+    """Records all connected screens, following monitors as they come and go.
+
+    `error_handler(error, error_string)` and `state_handler(recorder, state)`
+    receive the signals of every underlying QMediaRecorder.
+    """
+
+    # Emitted from the mosaic worker; delivered on the GUI thread.
+    mosaicComposed = pyqtSignal(QVideoFrame)
+
+    def __init__(
+        self,
+        output_dir=".",
+        mosaic=False,
+        error_handler=None,
+        state_handler=None,
+        parent=None,
+    ):
+        super().__init__(parent)
+        self.output_dir = Path(output_dir)
+        self.mosaic = mosaic
+        self.error_handler = error_handler
+        self.state_handler = state_handler
+        self.recording = False
+        self.file_index = 0
+        self.first_file_index = 0
+        # recorder -> stream name, fixed by its file so it survives unplugs.
+        self.stream_names = {}
+
+        # screen -> (QScreenCapture, QMediaCaptureSession, QMediaRecorder|QVideoSink)
+        self.captures = {}
+        # Pipelines of screens unplugged this session; their files still count.
+        self.removed = []
+
+        # Mosaic pipeline: a worker composes the screens, one encoder.
+        self.latest = {}
+        self.layout_lock = threading.Lock()
+        self.targets = []
+        self.layout_generation = 0
+        self.mosaic_input = None
+        self.mosaic_session = None
+        self.mosaic_recorder = None
+        self.mosaic_worker = None
+        self.mosaic_running = threading.Event()
+        self.mosaic_counters = {}
+        self.mosaicComposed.connect(self._send_mosaic_frame)
+
+        app = QGuiApplication.instance()
+        app.screenAdded.connect(self.on_screen_added)
+        app.screenRemoved.connect(self.on_screen_removed)
+
+    # Public API
+
+    def recorders(self):
+        if self.mosaic:
+            return [self.mosaic_recorder] if self.mosaic_recorder else []
+        active = [recorder for _, _, recorder in self.captures.values()]
+        return active + [recorder for _, _, recorder in self.removed]
+
+    def streams(self):
+        """(stream name, recorder) pairs; "screen" is the session's first file."""
+        if self.mosaic:
+            return [("screen", self.mosaic_recorder)] if self.mosaic_recorder else []
+        return [(self.stream_names[r], r) for r in self.recorders()]
+
+    def plans(self):
+        return [plan_screen(screen) for screen in self.captures]
+
+    def prepare(self, output_dir=None):
+        """Build a capture pipeline for every connected screen.
+
+        A new `output_dir` gives the session its own files, numbered from 0.
+        """
+        screens = QGuiApplication.screens()
+        if not screens:
+            raise ValueError("No screen found")
+        self._teardown()
+        if output_dir is not None:
+            self.output_dir = Path(output_dir)
+            self.file_index = 0
+        self.first_file_index = self.file_index
+        if self.mosaic:
+            self._setup_mosaic()
+        for screen in screens:
+            self._add_screen(screen)
+        if self.mosaic:
+            self._relayout()
+        print("Screen capture plans:", [p.as_dict() for p in self.plans()])
+
+    def record(self):
+        self.recording = True
+        for recorder in self.recorders():
+            recorder.record()
+        if self.mosaic:
+            self._start_mosaic()
+
+    def stop(self):
+        self.recording = False
+        self._stop_mosaic()
+        for recorder in self.recorders():
+            recorder.stop()
+        for capture, _, _ in self.captures.values():
+            capture.setActive(False)
+
+    def actual_locations(self):
+        return [r.actualLocation().toLocalFile() for r in self.recorders()]
+
+    def _teardown(self):
+        """Release the pipelines of a previous session."""
+        self._stop_mosaic()
+        for entry in list(self.captures.values()) + self.removed:
+            output = entry[2]
+            recorder = output if isinstance(output, QMediaRecorder) else None
+            delete_when_finalized(recorder, entry)
+        self.captures = {}
+        self.removed = []
+        self.stream_names = {}
+        self.latest = {}
+        mosaic = (self.mosaic_input, self.mosaic_session, self.mosaic_recorder)
+        delete_when_finalized(
+            self.mosaic_recorder, [obj for obj in mosaic if obj is not None]
+        )
+        self.mosaic_input = self.mosaic_session = self.mosaic_recorder = None
+
+    # Per-screen pipelines
+
+    def _add_screen(self, screen):
+        capture = QScreenCapture(self)
+        capture.setScreen(screen)
+        session = QMediaCaptureSession(self)
+        session.setScreenCapture(capture)
+
+        if self.mosaic:
+            # Frames only feed the mosaic canvas; nothing is encoded per screen.
+            output = QVideoSink(self)
+            session.setVideoSink(output)
+            latest = LatestFrame()
+            output.videoFrameChanged.connect(latest.on_frame)
+            self.latest[screen] = latest
+        else:
+            plan = plan_screen(screen)
+            output = QMediaRecorder(self)
+            output.setVideoResolution(plan.target_size)
+            output.setVideoFrameRate(plan.fps)
+            number = self.file_index - self.first_file_index
+            output.setOutputLocation(QUrl.fromLocalFile(self._next_path(screen)))
+            self.stream_names[output] = "screen" if number == 0 else f"screen-{number}"
+            self._connect_recorder(output)
+            session.setRecorder(output)
+
+        capture.setActive(True)
+        self.captures[screen] = (capture, session, output)
+        return output
+
+    def _next_path(self, screen):
+        path = self.output_dir / _file_name(screen, self.file_index)
+        self.file_index += 1
+        return str(path.resolve())
+
+    def _connect_recorder(self, recorder):
+        if self.error_handler:
+            recorder.errorOccurred.connect(self.error_handler)
+        if self.state_handler:
+            recorder.recorderStateChanged.connect(
+                lambda state, recorder=recorder: self.state_handler(recorder, state)
+            )
+
+    def on_screen_added(self, screen):
+        if not self.recording:
+            return
+        print(f"Screen added during session: {screen.name()}")
+        output = self._add_screen(screen)
+        if self.mosaic:
+            self._relayout()
+        else:
+            output.record()
+
+    def on_screen_removed(self, screen):
+        entry = self.captures.pop(screen, None)
+        if entry is None:
+            return
+        print(f"Screen removed during session: {screen.name()}")
+        capture, _, output = entry
+        capture.setActive(False)
+        if self.mosaic:
+            self.latest.pop(screen, None)
+            self._relayout()
+            for obj in entry:
+                obj.deleteLater()
+        else:
+            # Keep the recorder until the next session so its file is listed.
+            output.stop()
+            self.removed.append(entry)
+
+    # Mosaic pipeline
+
+    def _setup_mosaic(self):
+        # Canvases are allocated once per session and recycled.
+        self.canvas_pool = CanvasPool(MOSAIC_SIZE, MOSAIC_POOL_SIZE)
+        self.canvas_generation = [None] * MOSAIC_POOL_SIZE
+
+        frame_format = QVideoFrameFormat(
+            MOSAIC_SIZE, QVideoFrameFormat.PixelFormat.Format_RGBX8888
+        )
+        frame_format.setStreamFrameRate(MOSAIC_FPS)
+        self.mosaic_input = QVideoFrameInput(frame_format, self)
+        self.mosaic_session = QMediaCaptureSession(self)
+        self.mosaic_session.setVideoFrameInput(self.mosaic_input)
+        self.mosaic_recorder = QMediaRecorder(self)
+        self.mosaic_recorder.setVideoResolution(MOSAIC_SIZE)
+        self.mosaic_recorder.setVideoFrameRate(MOSAIC_FPS)
+        self.mosaic_recorder.setOutputLocation(
+            QUrl.fromLocalFile(str((self.output_dir / "screen_mosaic.mp4").resolve()))
+        )
+        self._connect_recorder(self.mosaic_recorder)
+        self.mosaic_session.setRecorder(self.mosaic_recorder)
+
+    def _relayout(self):
+        layout = mosaic_layout(list(self.captures), MOSAIC_SIZE)
+        with self.layout_lock:
+            self.targets = [
+                (self.latest[screen], rect)
+                for screen, rect in layout.items()
+                if screen in self.latest
+            ]
+            self.layout_generation += 1
+
+    def _start_mosaic(self):
+        self.mosaic_counters = {
+            "composed": 0,
+            "encoded": 0,
+            "dropped_by_encoder": 0,
+            "canvas_busy": 0,
+        }
+        self.mosaic_start = time.monotonic()
+        self.mosaic_running.set()
+        self.mosaic_worker = threading.Thread(
+            target=self._mosaic_loop, name="screen-mosaic", daemon=True
+        )
+        self.mosaic_worker.start()
+
+    def _stop_mosaic(self):
+        self.mosaic_running.clear()
+        if self.mosaic_worker is not None:
+            self.mosaic_worker.join(timeout=2)
+            self.mosaic_worker = None
+
+    def _mosaic_loop(self):
+        # Runs on the worker: downscale each screen from its mapped frame.
+        interval = 1.0 / MOSAIC_FPS
+        next_tick = time.monotonic()
+        while self.mosaic_running.is_set():
+            index, canvas = self.canvas_pool.acquire()
+            if canvas is None:
+                # Every canvas is still queued in the encoder; skip this tick.
+                self.mosaic_counters["canvas_busy"] += 1
+            else:
+                with self.layout_lock:
+                    targets = list(self.targets)
+                    generation = self.layout_generation
+                painter = QPainter(canvas)
+                if self.canvas_generation[index] != generation:
+                    # Clear letterboxing and unplugged screens once per layout.
+                    canvas.fill(Qt.GlobalColor.black)
+                    self.canvas_generation[index] = generation
+                for latest, target in targets:
+                    draw_latest(painter, target, latest)
+                painter.end()
+
+                frame = QVideoFrame(canvas)
+                start_us = int((time.monotonic() - self.mosaic_start) * 1_000_000)
+                frame.setStartTime(start_us)
+                frame.setEndTime(start_us + int(interval * 1_000_000))
+                self.mosaic_counters["composed"] += 1
+                self.mosaicComposed.emit(frame)
+                # Drop our reference so the canvas can be released.
+                del frame
+
+            next_tick += interval
+            delay = next_tick - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            else:
+                next_tick = time.monotonic()
+
+    def _send_mosaic_frame(self, frame):
+        # GUI thread
+        if not self.mosaic_running.is_set():
+            return
+        if self.mosaic_input.sendVideoFrame(frame):
+            self.mosaic_counters["encoded"] += 1
+        else:
+            self.mosaic_counters["dropped_by_encoder"] += 1
+
+
+if __name__ == "__main__":
+    import json
+    import sys
+
+    from PyQt6.QtWidgets import QApplication
+
+    app = QApplication(sys.argv)
+    print(json.dumps(encode_cost_report(QGuiApplication.screens()), indent=2))
@@ -0,0 +1,190 @@
+"""GUI-thread stall watchdog.
+
+A heartbeat timer runs through the Qt event loop and records how late each
+tick fires. A monitor thread notices when the heartbeat has been silent for
+longer than the threshold, captures the GUI thread's Python stack with
+sys._current_frames, and logs the stall with its duration once the loop
+recovers. Stalls are ranked by stack and written, with an event-loop latency
+histogram, when the application quits.
+
+Opt in with DESQT_WATCHDOG=1, or DESQT_WATCHDOG=<threshold in ms>.
+"""
+
+import bisect
+import logging
+import os
+import sys
+import threading
+import time
+import traceback
+from logging.handlers import RotatingFileHandler
+
+from PyQt6.QtCore import QCoreApplication, Qt, QTimer
+
+DEFAULT_THRESHOLD_MS = 250
+HEARTBEAT_MS = 50
+LOG_FILE = "stall_watchdog.log"
+# Upper bounds (ms) of the event-loop latency histogram buckets.
+LATENCY_BUCKETS_MS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+# Frames of the stall stack that identify it when ranking.
+SIGNATURE_FRAMES = 3
+
+_watchdog = None
+
+
+class LatencyHistogram:
+    """Per-bucket counts of event-loop latency in milliseconds."""
+
+    def __init__(self, bounds=LATENCY_BUCKETS_MS):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, ms):
+        self.counts[bisect.bisect_left(self.bounds, ms)] += 1
+        self.total += ms
+        self.count += 1
+
+    def format(self):
+        lines = []
+        labels = [f"<= {b} ms" for b in self.bounds] + [f"> {self.bounds[-1]} ms"]
+        for label, n in zip(labels, self.counts):
+            if n:
+                lines.append(f"  {label:>12}: {n}")
+        mean = self.total / self.count if self.count else 0.0
+        lines.append(f"  {self.count} beats, mean latency {mean:.1f} ms")
+        return "\n".join(lines)
+
+
+class GuiWatchdog:
+    """Detects and logs GUI-thread stalls longer than `threshold_ms`."""
+
+    def __init__(
+        self,
+        threshold_ms=DEFAULT_THRESHOLD_MS,
+        heartbeat_ms=HEARTBEAT_MS,
+        log_file=LOG_FILE,
+    ):
+        self.threshold = threshold_ms / 1000
+        self.heartbeat = heartbeat_ms / 1000
+        self.gui_thread = threading.main_thread().ident
+
+        self.log = logging.getLogger("desqt.watchdog")
+        self.log.setLevel(logging.INFO)
+        self.log.propagate = False
+        if not self.log.handlers:
+            handler = RotatingFileHandler(
+                log_file, maxBytes=1024 * 1024, backupCount=3, encoding="utf-8"
+            )
+            handler.setFormatter(logging.Formatter("%(asctime)s %(message)s"))
+            self.log.addHandler(handler)
+
+        self.histogram = LatencyHistogram()
+        # Stack signature -> [count, total seconds, max seconds, stack].
+        self.stalls = {}
+        self.lock = threading.Lock()
+        self.last_beat = time.monotonic()
+        self.running = threading.Event()
+        self.monitor = None
+
+        self.timer = QTimer()
+        self.timer.setTimerType(Qt.TimerType.PreciseTimer)
+        self.timer.setInterval(heartbeat_ms)
+        self.timer.timeout.connect(self.beat)
+
+    def start(self):
+        self.last_beat = time.monotonic()
+        self.timer.start()
+        self.running.set()
+        self.monitor = threading.Thread(
+            target=self._monitor_loop, name="stall-watchdog", daemon=True
+        )
+        self.monitor.start()
+        self.log.info(
+            "watchdog started (threshold %d ms, pid %d)",
+            self.threshold * 1000,
+            os.getpid(),
+        )
+
+    def stop(self):
+        if not self.running.is_set():
+            return
+        self.running.clear()
+        self.timer.stop()
+        self.monitor.join(timeout=1)
+        self.log.info("%s", self.summary())
+
+    # GUI thread
+
+    def beat(self):
+        now = time.monotonic()
+        late_ms = max(0.0, (now - self.last_beat - self.heartbeat) * 1000)
+        self.histogram.observe(late_ms)
+        self.last_beat = now
+
+    # Monitor thread
+
+    def _monitor_loop(self):
+        stalled_since = None
+        stack = None
+        while self.running.is_set():
+            time.sleep(self.heartbeat / 2)
+            last_beat = self.last_beat
+            silent = time.monotonic() - last_beat
+            if stalled_since is None:
+                if silent > self.threshold:
+                    stalled_since = last_beat
+                    stack = self._gui_stack()
+                    self.log.warning(
+                        "GUI thread blocked for %.0f ms, stack:\n%s",
+                        silent * 1000,
+                        "".join(stack),
+                    )
+            elif last_beat != stalled_since:
+                # The loop came back; the late beat marks the end of the stall.
+                self._record_stall(last_beat - stalled_since, stack)
+                stalled_since = None
+
+    def _gui_stack(self):
+        frame = sys._current_frames().get(self.gui_thread)
+        if frame is None:
+            return ["  <GUI thread stack unavailable>\n"]
+        return traceback.format_stack(frame)
+
+    def _record_stall(self, duration, stack):
+        signature = "".join(stack[-SIGNATURE_FRAMES:])
+        with self.lock:
+            entry = self.stalls.setdefault(signature, [0, 0.0, 0.0, stack])
+            entry[0] += 1
+            entry[1] += duration
+            entry[2] = max(entry[2], duration)
+        self.log.warning("GUI stall of %.0f ms ended", duration * 1000)
+
+    def summary(self, top=10):
+        """Stalls ranked by total blocked time, then the latency histogram."""
+        with self.lock:
+            ranked = sorted(self.stalls.values(), key=lambda e: e[1], reverse=True)
+        lines = [f"watchdog summary: {sum(e[0] for e in ranked)} stalls"]
+        for count, total, longest, stack in ranked[:top]:
+            lines.append(
+                f"{count} stalls, {total * 1000:.0f} ms total, "
+                f"{longest * 1000:.0f} ms max, at:\n"
+                + "".join(stack[-SIGNATURE_FRAMES:])
+            )
+        lines.append("event-loop latency:\n" + self.histogram.format())
+        return "\n".join(lines)
+
+
+def install_from_env():
+    """Start the process-wide watchdog if DESQT_WATCHDOG is set; idempotent."""
+    global _watchdog
+    value = os.environ.get("DESQT_WATCHDOG")
+    if _watchdog is not None or not value or value == "0":
+        return _watchdog
+    threshold = int(value) if value.isdigit() and value != "1" else DEFAULT_THRESHOLD_MS
+    _watchdog = GuiWatchdog(threshold)
+    _watchdog.start()
+    QCoreApplication.instance().aboutToQuit.connect(_watchdog.stop)
+    print(f"GUI watchdog active, logging stalls over {threshold} ms to {LOG_FILE}")
+    return _watchdog
@@ -0,0 +1,193 @@
+"""Local stand-in for the recording collection server, with fault injection.
+
+Speaks the protocol described in uploader.py. Run it next to the app to try
+uploads end to end:
+
+    python -m upload_server --port 8765 --fail-rate 0.2 --drop-rate 0.05
+    python -m uploader http://127.0.0.1:8765/uploads screen_recording.mp4
+"""
+
+import argparse
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import unquote
+
+CONTENT_RANGE = re.compile(r"bytes (?:(\d+)-(\d+)|\*)/(\d+)")
+
+
+class UploadStore:
+    """Keeps partial uploads on disk and tracks which byte ranges arrived."""
+
+    def __init__(self, directory):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.lock = threading.Lock()
+        self.ranges = {}  # upload_id -> list of (first, end) byte ranges
+        self.lengths = {}
+
+    def part_path(self, upload_id):
+        return self.directory / f"{upload_id}.part"
+
+    def write(self, upload_id, first, data, total):
+        path = self.part_path(upload_id)
+        with self.lock:
+            self.lengths[upload_id] = total
+            self.ranges.setdefault(upload_id, [])
+            path.touch(exist_ok=True)
+            with open(path, "r+b") as f:
+                f.seek(first)
+                f.write(data)
+            if data:
+                self.ranges[upload_id].append((first, first + len(data)))
+
+    def offset(self, upload_id):
+        """Return the contiguous byte count from the start, or None if unknown."""
+        with self.lock:
+            if upload_id not in self.ranges:
+                return None
+            offset = 0
+            for first, end in sorted(self.ranges[upload_id]):
+                if first > offset:
+                    break
+                offset = max(offset, end)
+            return offset
+
+    def finish(self, upload_id, name):
+        path = self.part_path(upload_id)
+        final_path = self.directory / f"{upload_id}-{Path(name).name}"
+        with self.lock:
+            path.replace(final_path)
+            self.ranges.pop(upload_id, None)
+            self.lengths.pop(upload_id, None)
+        return final_path
+
+
+class UploadHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def upload_id(self):
+        return unquote(self.path.rstrip("/").rsplit("/", 1)[-1])
+
+    def reply(self, status, headers=None):
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def inject_fault(self):
+        """Randomly delay, fail or drop the request. Returns True if handled."""
+        server = self.server
+        if server.delay:
+            time.sleep(random.uniform(0, server.delay))
+        roll = random.random()
+        if roll < server.drop_rate:
+            # Simulate a network drop: hang up without answering.
+            self.close_connection = True
+            self.connection.close()
+            return True
+        if roll < server.drop_rate + server.fail_rate:
+            length = int(self.headers.get("Content-Length", 0))
+            self.rfile.read(length)
+            self.reply(503)
+            return True
+        return False
+
+    def do_HEAD(self):
+        if self.inject_fault():
+            return
+        offset = self.server.store.offset(self.upload_id())
+        if offset is None:
+            self.reply(404)
+        else:
+            self.reply(200, {"Upload-Offset": str(offset)})
+
+    def do_PUT(self):
+        length = int(self.headers.get("Content-Length", 0))
+        match = CONTENT_RANGE.fullmatch(self.headers.get("Content-Range", ""))
+        if match is None:
+            self.rfile.read(length)
+            self.reply(400)
+            return
+        if self.inject_fault():
+            return
+        first = int(match.group(1) or 0)
+        total = int(match.group(3))
+        data = self.rfile.read(length)
+        if len(data) != length:
+            self.close_connection = True
+            return
+        self.server.store.write(self.upload_id(), first, data, total)
+        self.reply(204)
+
+    def do_POST(self):
+        if self.inject_fault():
+            return
+        upload_id = self.upload_id()
+        total = int(self.headers.get("Upload-Length", 0))
+        offset = self.server.store.offset(upload_id)
+        if offset is None or offset < total:
+            self.reply(409, {"Upload-Offset": str(offset or 0)})
+            return
+        name = unquote(self.headers.get("Upload-Name", "recording"))
+        final_path = self.server.store.finish(upload_id, name)
+        if self.server.verbose:
+            print(f"Stored {final_path}")
+        self.reply(201)
+
+
+class UploadServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(
+        self,
+        address,
+        directory,
+        fail_rate=0.0,
+        drop_rate=0.0,
+        delay=0.0,
+        verbose=False,
+    ):
+        super().__init__(address, UploadHandler)
+        self.store = UploadStore(directory)
+        self.fail_rate = fail_rate
+        self.drop_rate = drop_rate
+        self.delay = delay
+        self.verbose = verbose
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stand-in upload server.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--dir", default="uploads")
+    parser.add_argument("--fail-rate", type=float, default=0.0)
+    parser.add_argument("--drop-rate", type=float, default=0.0)
+    parser.add_argument("--delay", type=float, default=0.0, help="Max seconds")
+    args = parser.parse_args()
+
+    server = UploadServer(
+        (args.host, args.port),
+        args.dir,
+        fail_rate=args.fail_rate,
+        drop_rate=args.drop_rate,
+        delay=args.delay,
+        verbose=True,
+    )
+    print(f"Upload server listening on http://{args.host}:{args.port}/uploads")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,486 @@
+"""Chunked, resumable upload of session recordings to a collection server.
+
+Protocol spoken with the collection server (see upload_server.py for a local
+stand-in):
+
+    HEAD {endpoint}/{upload_id}
+        -> 200 with "Upload-Offset" (contiguous bytes stored) or 404
+    PUT  {endpoint}/{upload_id}
+        "Content-Range: bytes <first>-<last>/<total>", body is one chunk
+        -> 2xx once the chunk is stored
+    POST {endpoint}/{upload_id}
+        "Upload-Length: <total>", "Upload-Name: <file name>"
+        -> 2xx when every byte is present, 409 with "Upload-Offset" otherwise
+"""
+
+import http.client
+import json
+import os
+import random
+import shutil
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from queue import Empty, LifoQueue, Queue
+from urllib.parse import quote, urlsplit
+
+DEFAULT_CHUNK_SIZE = 4 * 1024 * 1024
+# Size of the pieces a chunk body is written in, so the bandwidth cap is smooth.
+SEND_PIECE_SIZE = 64 * 1024
+
+# Status codes worth retrying; any other 4xx is treated as permanent.
+RETRYABLE_STATUS = {408, 425, 429, 500, 502, 503, 504}
+
+
+class UploadError(Exception):
+    """Raised when an upload fails permanently or runs out of retries."""
+
+
+class TokenBucket:
+    """Thread-safe token bucket shared by every upload worker."""
+
+    def __init__(self, rate, burst=None):
+        self.rate = float(rate)
+        # Keep the default burst small so the cap holds over short windows.
+        self.capacity = float(
+            burst if burst is not None else max(rate / 4, SEND_PIECE_SIZE)
+        )
+        self.tokens = self.capacity
+        self.last = time.monotonic()
+        self.lock = threading.Lock()
+
+    def consume(self, amount):
+        """Block until `amount` bytes may be sent."""
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(
+                    self.capacity, self.tokens + (now - self.last) * self.rate
+                )
+                self.last = now
+                # Allow pieces larger than the bucket by going into debt.
+                if self.tokens >= min(amount, self.capacity):
+                    self.tokens -= amount
+                    return
+                wait = (min(amount, self.capacity) - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+class ConnectionPool:
+    """A small pool of keep-alive HTTP connections to one host."""
+
+    def __init__(self, endpoint, size, timeout=30):
+        parts = urlsplit(endpoint)
+        if parts.scheme not in ("http", "https"):
+            raise ValueError(f"Unsupported upload endpoint: {endpoint}")
+        self.scheme = parts.scheme
+        self.host = parts.hostname
+        self.port = parts.port
+        self.base_path = parts.path.rstrip("/")
+        self.timeout = timeout
+        self.connections = LifoQueue(maxsize=size)
+
+    def _new_connection(self):
+        if self.scheme == "https":
+            return http.client.HTTPSConnection(
+                self.host, self.port, timeout=self.timeout
+            )
+        return http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+
+    def acquire(self):
+        try:
+            return self.connections.get_nowait()
+        except Empty:
+            return self._new_connection()
+
+    def release(self, connection, reusable=True):
+        """Return a connection to the pool, or close it if it is broken."""
+        if not reusable:
+            connection.close()
+            return
+        try:
+            self.connections.put_nowait(connection)
+        except Exception:
+            connection.close()
+
+    def close(self):
+        while True:
+            try:
+                self.connections.get_nowait().close()
+            except Empty:
+                return
+
+    def path_for(self, upload_id):
+        return f"{self.base_path}/{quote(upload_id)}"
+
+
+class UploadQueue:
+    """Persistent queue of uploads, stored as a JSON file next to the app.
+
+    Each entry remembers which chunks the server acknowledged, so an upload
+    interrupted by a crash or a network drop resumes where it stopped.
+    Finished entries are dropped, so the file only holds outstanding work.
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.lock = threading.Lock()
+        self.entries = []
+        if self.path.exists():
+            try:
+                with open(self.path, "r", encoding="utf-8") as f:
+                    entries = json.load(f)
+                self.entries = [e for e in entries if e.get("status") == "pending"]
+            except (OSError, ValueError) as e:
+                print(f"Upload queue unreadable, starting empty: {e}")
+
+    def _save(self):
+        # Write to a temporary file and swap it in so a crash never leaves
+        # a half-written queue behind.
+        tmp_path = self.path.with_suffix(self.path.suffix + ".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.entries, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+
+    def add(self, upload_id, file_path, name, chunk_size):
+        file_path = Path(file_path).resolve()
+        entry = {
+            "upload_id": upload_id,
+            "file": str(file_path),
+            "name": name,
+            "size": file_path.stat().st_size,
+            "mtime": file_path.stat().st_mtime,
+            "chunk_size": chunk_size,
+            "acked": [],
+            "status": "pending",
+        }
+        with self.lock:
+            self.entries.append(entry)
+            self._save()
+        return entry
+
+    def pending(self):
+        with self.lock:
+            return [dict(e) for e in self.entries if e["status"] == "pending"]
+
+    def ack_chunk(self, upload_id, index):
+        with self.lock:
+            for entry in self.entries:
+                if entry["upload_id"] == upload_id:
+                    if index not in entry["acked"]:
+                        entry["acked"].append(index)
+                    break
+            self._save()
+
+    def update(self, upload_id, /, **fields):
+        with self.lock:
+            for entry in self.entries:
+                if entry["upload_id"] == upload_id:
+                    entry.update(fields)
+                    break
+            self._save()
+
+    def remove(self, upload_id):
+        with self.lock:
+            self.entries = [e for e in self.entries if e["upload_id"] != upload_id]
+            self._save()
+
+
+class RecordingUploader:
+    """Uploads queued recordings in fixed-size chunks, several at a time."""
+
+    def __init__(
+        self,
+        endpoint,
+        queue_path="upload_queue.json",
+        spool_dir="upload_spool",
+        chunk_size=DEFAULT_CHUNK_SIZE,
+        max_in_flight=4,
+        max_retries=6,
+        backoff=0.5,
+        max_backoff=30.0,
+        bandwidth_limit=None,
+        timeout=30,
+    ):
+        self.chunk_size = chunk_size
+        self.max_in_flight = max_in_flight
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.pool = ConnectionPool(endpoint, max_in_flight, timeout=timeout)
+        self.queue = UploadQueue(queue_path)
+        self.spool_dir = Path(spool_dir)
+        self.spool_dir.mkdir(parents=True, exist_ok=True)
+        # Recordings handed over by enqueue(), added to the queue by the worker.
+        self.intake = Queue()
+        self.bucket = TokenBucket(bandwidth_limit) if bandwidth_limit else None
+
+        self.stats_lock = threading.Lock()
+        self.stats = {"bytes_sent": 0, "chunks_sent": 0, "retries": 0}
+
+        self._wake = threading.Event()
+        self._stopping = threading.Event()
+        self._thread = None
+
+    # Queue management
+
+    def enqueue(self, file_path):
+        """Queue a finished recording for upload and return its upload id.
+
+        The file is hard-linked into the spool directory at once, so deleting
+        the original or replacing it with a new file keeps the queued content.
+        Where linking is impossible the worker copies it instead. Queue writes
+        happen on the worker, so this is cheap enough for the GUI thread.
+        """
+        file_path = Path(file_path).resolve()
+        upload_id = uuid.uuid4().hex
+        spooled = self.spool_dir / f"{upload_id}-{file_path.name}"
+        try:
+            os.link(file_path, spooled)
+        except OSError:
+            spooled = None
+        self.intake.put((upload_id, file_path, spooled))
+        self._wake.set()
+        return upload_id
+
+    def _drain_intake(self):
+        while True:
+            try:
+                upload_id, file_path, spooled = self.intake.get_nowait()
+            except Empty:
+                return
+            if spooled is None:
+                spooled = self.spool_dir / f"{upload_id}-{file_path.name}"
+                try:
+                    shutil.copy2(file_path, spooled)
+                except OSError as e:
+                    print(f"Could not spool {file_path} for upload: {e}")
+                    continue
+            self.queue.add(upload_id, spooled, file_path.name, self.chunk_size)
+
+    def start(self):
+        """Drain the queue on a background thread until stop() is called."""
+        if self._thread is not None:
+            return
+        self._stopping.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="recording-uploader", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self, timeout=None):
+        self._stopping.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+        self.pool.close()
+
+    def _run(self):
+        while not self._stopping.is_set():
+            self.upload_pending()
+            self._wake.wait(timeout=60)
+            self._wake.clear()
+
+    def upload_pending(self):
+        """Upload every pending entry; failures stay queued for the next pass."""
+        self._drain_intake()
+        for entry in self.queue.pending():
+            if self._stopping.is_set():
+                return
+            self._drain_intake()
+            try:
+                self.upload(entry)
+            except UploadError as e:
+                print(f"Upload of {entry['file']} failed: {e}")
+
+    # Uploading
+
+    def upload(self, entry):
+        upload_id = entry["upload_id"]
+        file_path = Path(entry["file"])
+        if not file_path.exists():
+            self.queue.remove(upload_id)
+            raise UploadError(f"{file_path} no longer exists")
+        stat = file_path.stat()
+        if stat.st_size != entry["size"] or stat.st_mtime != entry["mtime"]:
+            # The file changed under us. Start a fresh upload so the server's
+            # partial data for the old id can never mix with the new content.
+            fields = {
+                "upload_id": uuid.uuid4().hex,
+                "size": stat.st_size,
+                "mtime": stat.st_mtime,
+                "acked": [],
+            }
+            self.queue.update(upload_id, **fields)
+            entry.update(fields)
+            upload_id = entry["upload_id"]
+
+        chunk_size = entry["chunk_size"]
+        total = entry["size"]
+        chunk_count = max(1, -(-total // chunk_size))
+
+        # Resume: trust the server's contiguous offset plus any chunks it
+        # acknowledged past that point before we were interrupted.
+        server_offset = self._query_offset(upload_id)
+        if server_offset is None:
+            acked = set()
+        else:
+            acked = set(entry["acked"]) | set(range(server_offset // chunk_size))
+        todo = [i for i in range(chunk_count) if i not in acked]
+
+        if todo:
+            with ThreadPoolExecutor(max_workers=self.max_in_flight) as executor:
+                futures = [
+                    executor.submit(self._send_chunk, entry, index) for index in todo
+                ]
+                errors = [f.exception() for f in futures if f.exception()]
+            if errors:
+                raise UploadError(str(errors[0]))
+
+        self._finish(entry)
+        self.queue.remove(upload_id)
+        if file_path.parent.resolve() == self.spool_dir.resolve():
+            file_path.unlink(missing_ok=True)
+        print(f"Uploaded {entry.get('name', file_path.name)} ({total} bytes)")
+
+    def _request(self, method, path, headers, body_file=None, offset=0, length=0):
+        """Send one request, streaming `length` bytes of `body_file` if given."""
+        connection = self.pool.acquire()
+        reusable = False
+        try:
+            connection.putrequest(method, path)
+            for name, value in headers.items():
+                connection.putheader(name, value)
+            connection.putheader("Content-Length", str(length))
+            connection.endheaders()
+            if body_file is not None:
+                body_file.seek(offset)
+                remaining = length
+                while remaining:
+                    piece = body_file.read(min(SEND_PIECE_SIZE, remaining))
+                    if not piece:
+                        raise UploadError("Recording shrank while uploading")
+                    if self.bucket is not None:
+                        self.bucket.consume(len(piece))
+                    connection.send(piece)
+                    remaining -= len(piece)
+            response = connection.getresponse()
+            response.read()
+            reusable = not response.will_close
+            return response
+        finally:
+            self.pool.release(connection, reusable)
+
+    def _with_retries(self, attempt_fn, description):
+        delay = self.backoff
+        for attempt in range(self.max_retries + 1):
+            try:
+                response = attempt_fn()
+                if response.status < 400 or response.status not in RETRYABLE_STATUS:
+                    return response
+                reason = f"HTTP {response.status}"
+            except (OSError, http.client.HTTPException) as e:
+                reason = str(e) or type(e).__name__
+            if attempt == self.max_retries:
+                break
+            with self.stats_lock:
+                self.stats["retries"] += 1
+            # Exponential backoff with full jitter.
+            time.sleep(random.uniform(0, delay))
+            delay = min(self.max_backoff, delay * 2)
+        raise UploadError(f"{description} failed after retries: {reason}")
+
+    def _query_offset(self, upload_id):
+        path = self.pool.path_for(upload_id)
+        response = self._with_retries(
+            lambda: self._request("HEAD", path, {}), "Offset query"
+        )
+        if response.status == 404:
+            return None
+        if response.status >= 400:
+            raise UploadError(f"Offset query rejected: HTTP {response.status}")
+        return int(response.getheader("Upload-Offset", "0"))
+
+    def _send_chunk(self, entry, index):
+        chunk_size = entry["chunk_size"]
+        total = entry["size"]
+        first = index * chunk_size
+        length = min(chunk_size, total - first)
+        headers = {
+            "Content-Type": "application/octet-stream",
+            "Content-Range": f"bytes {first}-{first + length - 1}/{total}",
+        }
+        if length <= 0:
+            # Empty recordings still need the upload to exist on the server.
+            headers["Content-Range"] = f"bytes */{total}"
+            length = 0
+        path = self.pool.path_for(entry["upload_id"])
+
+        with open(entry["file"], "rb") as f:
+            response = self._with_retries(
+                lambda: self._request("PUT", path, headers, f, first, length),
+                f"Chunk {index}",
+            )
+        if response.status >= 300:
+            raise UploadError(f"Chunk {index} rejected: HTTP {response.status}")
+
+        self.queue.ack_chunk(entry["upload_id"], index)
+        with self.stats_lock:
+            self.stats["bytes_sent"] += length
+            self.stats["chunks_sent"] += 1
+
+    def _finish(self, entry):
+        path = self.pool.path_for(entry["upload_id"])
+        headers = {
+            "Upload-Length": str(entry["size"]),
+            "Upload-Name": quote(entry.get("name", Path(entry["file"]).name)),
+        }
+        response = self._with_retries(
+            lambda: self._request("POST", path, headers), "Upload completion"
+        )
+        if response.status == 409:
+            # The server lost chunks; forget our acks so the next pass resends.
+            offset = int(response.getheader("Upload-Offset", "0"))
+            acked = list(range(offset // entry["chunk_size"]))
+            self.queue.update(entry["upload_id"], acked=acked)
+            raise UploadError("Server is missing chunks, will resume")
+        if response.status >= 300:
+            raise UploadError(f"Upload completion rejected: HTTP {response.status}")
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Upload session recordings.")
+    parser.add_argument("endpoint", help="Collection server URL")
+    parser.add_argument("files", nargs="*", help="Recordings to queue")
+    parser.add_argument("--queue", default="upload_queue.json")
+    parser.add_argument("--spool", default="upload_spool")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument("--in-flight", type=int, default=4)
+    parser.add_argument("--bandwidth", type=int, help="Cap in bytes per second")
+    args = parser.parse_args()
+
+    uploader = RecordingUploader(
+        args.endpoint,
+        queue_path=args.queue,
+        spool_dir=args.spool,
+        chunk_size=args.chunk_size,
+        max_in_flight=args.in_flight,
+        bandwidth_limit=args.bandwidth,
+    )
+    for file_path in args.files:
+        uploader.enqueue(file_path)
+    started = time.monotonic()
+    uploader.upload_pending()
+    uploader.pool.close()
+    print(json.dumps({**uploader.stats, "seconds": time.monotonic() - started}))
+
+
+if __name__ == "__main__":
+    main()
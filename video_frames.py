@@ -0,0 +1,130 @@
+"""Helpers for compositing video frames off the GUI thread.
+
+Sink frames reach a worker thread through LatestFrame and are read with
+MappedFrame, which wraps the mapped pixels in a QImage without copying.
+Output canvases come from a CanvasPool that only hands out canvases the
+encoder has released, so painting never forces a detach and a new allocation.
+"""
+
+import threading
+
+from PyQt6.QtGui import QImage
+from PyQt6.QtMultimedia import QVideoFrame, QVideoFrameFormat
+
+
+def image_format(frame):
+    """QImage format matching a frame's pixels, or Format_Invalid (e.g. YUV)."""
+    return QVideoFrameFormat.imageFormatFromPixelFormat(frame.pixelFormat())
+
+
+class MappedFrame:
+    """Read-only QImage view of a video frame's pixels, valid inside `with`.
+
+    Yields None when the frame cannot be mapped or is not an RGB format.
+    """
+
+    def __init__(self, frame):
+        self.frame = frame
+        self.mapped = False
+
+    def __enter__(self):
+        frame = self.frame
+        if frame is None or not frame.isValid():
+            return None
+        fmt = image_format(frame)
+        if fmt == QImage.Format.Format_Invalid:
+            return None
+        if not frame.map(QVideoFrame.MapMode.ReadOnly):
+            return None
+        self.mapped = True
+        bits = frame.bits(0)
+        bits.setsize(frame.mappedBytes(0))
+        return QImage(bits, frame.width(), frame.height(), frame.bytesPerLine(0), fmt)
+
+    def __exit__(self, *exc_info):
+        if self.mapped:
+            self.frame.unmap()
+            self.mapped = False
+
+
+class LatestFrame:
+    """Latest frame of a video sink, handed from the GUI thread to a worker.
+
+    RGB frames are passed through untouched and mapped on the worker. Other
+    pixel formats cannot be mapped into a QImage, so they are converted with
+    toImage() on the GUI thread, but only once the worker has taken the
+    previous conversion: at most once per composed frame, not once per frame.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.frame = None
+        self.image = None
+        self.taken = True
+        self.received = 0
+        self.size = None
+
+    def on_frame(self, frame):
+        """Slot for QVideoSink.videoFrameChanged (GUI thread)."""
+        self.received += 1
+        if not frame.isValid():
+            return
+        self.size = frame.size()
+        if image_format(frame) != QImage.Format.Format_Invalid:
+            with self.lock:
+                self.frame = frame
+                self.image = None
+            return
+        if not self.taken:
+            return
+        image = frame.toImage()
+        with self.lock:
+            self.frame = None
+            self.image = image
+            self.taken = False
+
+    def take(self):
+        """Return (frame, image); exactly one is set, or both are None."""
+        with self.lock:
+            self.taken = True
+            return self.frame, self.image
+
+    def clear(self):
+        with self.lock:
+            self.frame = None
+            self.image = None
+            self.taken = True
+
+
+def draw_latest(painter, target, latest):
+    """Draw the latest frame into `target`; return False if there was none."""
+    frame, image = latest.take()
+    if image is not None:
+        painter.drawImage(target, image)
+        return True
+    with MappedFrame(frame) as mapped:
+        if mapped is None:
+            return False
+        painter.drawImage(target, mapped)
+    return True
+
+
+class CanvasPool:
+    """Output canvases recycled only once no video frame refers to them."""
+
+    def __init__(self, size, count):
+        self.canvases = [
+            QImage(size, QImage.Format.Format_RGBX8888) for _ in range(count)
+        ]
+        self.next = 0
+
+    def acquire(self):
+        """Return (index, canvas) of a released canvas, or (None, None)."""
+        for _ in range(len(self.canvases)):
+            index = self.next
+            self.next = (self.next + 1) % len(self.canvases)
+            # A canvas still shared with a frame in the encoder queue would
+            # detach (and reallocate) as soon as we painted into it.
+            if self.canvases[index].isDetached():
+                return index, self.canvases[index]
+        return None, None